@@ -0,0 +1,134 @@
+"""
+Adaptive Limiter - AIMD in-flight limit for Bedrock calls, with priorities
+The limit grows by about one per round of healthy calls and is halved on
+throttling or latency spikes, so throughput settles near the account quota
+instead of every call slowing down together. Waiters are served by priority
+(required form fields first), then in arrival order.
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import threading
+import time
+from typing import List, Tuple
+
+from config import config
+
+logger = logging.getLogger("ai-service")
+
+PRIORITY_REQUIRED = 0
+PRIORITY_OPTIONAL = 1
+
+
+def priority_for(required: bool) -> int:
+    return PRIORITY_REQUIRED if required else PRIORITY_OPTIONAL
+
+
+class AdaptiveLimiter:
+    """
+    acquire()/release() run on the event loop; on_success()/on_overload() may be
+    called from any thread (they only move the limit, waiters are woken on release)
+    """
+
+    def __init__(self, initial: int, min_limit: int, max_limit: int, adaptive: bool):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.adaptive = adaptive
+        self._limit = float(min(self.max_limit, max(self.min_limit, initial)))
+        self._lock = threading.Lock()
+        self._last_decrease = 0.0
+        self._in_flight = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self.increases = 0
+        self.decreases = 0
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    # ---------- admission (event loop) ----------
+
+    async def acquire(self, priority: int = PRIORITY_OPTIONAL):
+        if self._in_flight < self.limit and not self._waiters:
+            self._in_flight += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        # Also drops waiters cancelled while no slot was being released
+        self._wake()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Slot was handed over just before the cancel
+                self.release()
+            raise
+
+    def release(self):
+        self._in_flight -= 1
+        self._wake()
+
+    def _wake(self):
+        while self._waiters and self._in_flight < self.limit:
+            _, _, future = heapq.heappop(self._waiters)
+            if future.cancelled():
+                continue
+            self._in_flight += 1
+            future.set_result(None)
+
+    # ---------- AIMD (any thread) ----------
+
+    def on_success(self, latency_spike: bool = False):
+        if latency_spike:
+            self.on_overload()
+            return
+        if not self.adaptive:
+            return
+        with self._lock:
+            # Only grow a limit that is actually being used
+            if self._limit < self.max_limit and 2 * self._in_flight >= self._limit:
+                previous = self.limit
+                # +1 per `limit` successful calls
+                self._limit = min(float(self.max_limit), self._limit + 1.0 / self._limit)
+                if self.limit > previous:
+                    self.increases += 1
+
+    def on_overload(self):
+        """Throttling or a latency spike: halve the limit (once per AIMD_DECREASE_INTERVAL)"""
+        if not self.adaptive:
+            return
+        with self._lock:
+            now = time.monotonic()
+            # Calls already in flight report the same overload; count it once
+            if now - self._last_decrease < config.AIMD_DECREASE_INTERVAL:
+                return
+            self._last_decrease = now
+            previous = self.limit
+            self._limit = max(float(self.min_limit), self._limit / 2)
+            self.decreases += 1
+        logger.warning(f"🐢 Bedrock concurrency limit {previous} → {self.limit}")
+
+    def stats(self) -> dict:
+        queued = [p for p, _, f in self._waiters if not f.cancelled()]
+        return {
+            "adaptive": self.adaptive,
+            "limit": self.limit,
+            "minLimit": self.min_limit,
+            "maxLimit": self.max_limit,
+            "increases": self.increases,
+            "decreases": self.decreases,
+            "queuedRequired": queued.count(PRIORITY_REQUIRED),
+            "queuedOptional": queued.count(PRIORITY_OPTIONAL),
+        }
+
+
+# Global limiter for model calls (used by the inference pool, fed by bedrock_guard)
+bedrock_limiter = AdaptiveLimiter(
+    initial=config.PREDICTION_MAX_IN_FLIGHT,
+    min_limit=config.AIMD_MIN_IN_FLIGHT,
+    max_limit=max(config.PREDICTION_MAX_IN_FLIGHT, config.AIMD_MAX_IN_FLIGHT)
+    if config.ADAPTIVE_CONCURRENCY else config.PREDICTION_MAX_IN_FLIGHT,
+    adaptive=config.ADAPTIVE_CONCURRENCY,
+)
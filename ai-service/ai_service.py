@@ -138,12 +138,21 @@ Key guarantees:
 - Intent is always non-null and normalized to an allowed intent
 """
 
+import asyncio
 import json
-import os
 import re
-import boto3
-from typing import Optional, Dict, Any, List
-from models import AIRequest, AIResponse
+from typing import Optional, Dict, Any, List, Tuple, Iterator, AsyncIterator, Callable
+from models import AIRequest, AIResponse, BatchQuestion
+from config import config
+from llm_backend import llm_backend
+from bedrock_guard import BedrockUnavailable, bedrock_guard
+from inference_pool import inference_pool
+from adaptive_limiter import priority_for
+from prediction_cache import prediction_cache, prediction_key, profile_fingerprint
+from single_flight import prediction_flights
+from profile_projection import profile_block
+from model_router import Route, route_for, routing_stats
+from intent_classifier import intent_classifier
 
 
 # -----------------------------
@@ -207,31 +216,40 @@ FORBIDDEN_ANSWER_PATTERNS = [
 ]
 
 
-def _normalize_intent(intent: Optional[str], question: str) -> str:
-    """Normalize / infer intent safely to prevent memory pollution."""
+def _normalize_intent(intent: Optional[str], question: str) -> Tuple[str, str]:
+    """
+    Normalize / infer intent safely to prevent memory pollution.
+    Returns (intent, source): "model" when the model's intent was usable,
+    "classifier" when the local classifier filled it in, else "rules".
+    """
     if not intent:
         intent = ""
 
     raw = intent.strip()
     key = raw.lower().replace(" ", "").replace("-", "").replace("_", "")
 
-    if raw in ALLOWED_INTENTS:
-        return raw
+    if raw in ALLOWED_INTENTS and raw != "unknown":
+        return raw, "model"
 
     if key in INTENT_NORMALIZATION:
-        return INTENT_NORMALIZATION[key]
+        return INTENT_NORMALIZATION[key], "model"
+
+    # Model gave nothing usable: a confident local classification
+    known = intent_classifier.confident_intent(question)
+    if known:
+        return known, "classifier"
 
     # Heuristic inference from question text (backup)
     q = (question or "").lower()
     if "salary" in q or "compensation" in q or "pay" in q:
-        return "personal.desiredSalary"
+        return "personal.desiredSalary", "rules"
     if "anything else" in q or "additional" in q or "know about you" in q:
-        return "personal.additionalInfo"
+        return "personal.additionalInfo", "rules"
     if "strong fit" in q or "why you" in q or "why should we hire" in q:
-        return "experience.whyFit"
+        return "experience.whyFit", "rules"
 
     # Otherwise fallback
-    return "unknown"
+    return "unknown", "rules"
 
 
 def _is_forbidden_answer(ans: str) -> bool:
@@ -283,43 +301,11 @@ def _repair_answer(question: str, options: Optional[List[str]], intent: str) ->
             "a results-driven approach. I’m ready to contribute from day one.")
 
 
-def predict_answer(request: AIRequest) -> AIResponse:
-    """
-    Predict answer using AWS Bedrock (Amazon Nova)
-    """
-    try:
-        aws_region = os.environ.get("AWS_REGION", "us-east-1")
-        aws_access_key = os.environ.get("AWS_ACCESS_KEY_ID")
-        aws_secret_key = os.environ.get("AWS_SECRET_ACCESS_KEY")
-
-        if not aws_access_key or not aws_secret_key:
-            return AIResponse(
-                answer="",
-                confidence=0.0,
-                reasoning="AWS Credentials Missing",
-                intent="unknown",
-            )
-
-        bedrock = boto3.client(
-            service_name="bedrock-runtime",
-            region_name=aws_region,
-            aws_access_key_id=aws_access_key,
-            aws_secret_access_key=aws_secret_key,
-        )
-
-        # IMPORTANT: Do NOT put the phrase "Free text input" anywhere.
-        options_block = ""
-        if request.options and len(request.options) > 0:
-            options_block = (
-                "\n\nAVAILABLE OPTIONS (CHOOSE EXACTLY ONE, COPY EXACTLY):\n"
-                + "\n".join([f"- {o}" for o in request.options])
-            )
-        else:
-            options_block = "\n\nThis question requires a written response."
-
-        allowed_intents_block = "\n".join([f"- {i}" for i in sorted(ALLOWED_INTENTS)])
+# -----------------------------
+# PROMPT BUILDING
+# -----------------------------
 
-        prompt = f"""
+PROMPT_PERSONA = """
 You are a HUMAN job applicant.
 You have 5+ years of EXPERIENCE in JOB APPLYING (NOT professional work experience).
 This job matters a lot to you — you answer strategically to maximize hiring chances.
@@ -329,17 +315,9 @@ NON-NEGOTIABLE RULES:
 - NEVER leave the answer blank
 - If details are missing, make safe, positive, recruiter-friendly assumptions
 - Keep opportunities open (flexibility, willingness, enthusiasm)
+"""
 
-USER PROFILE (may be incomplete):
-{json.dumps(request.userProfile, indent=2)}
-
-QUESTION:
-{request.question}
-{options_block}
-
-ALLOWED INTENTS (MUST SELECT EXACTLY ONE):
-{allowed_intents_block}
-
+PROMPT_RULES = """
 URL/LINK QUESTIONS (MANDATORY):
 - For LinkedIn, Portfolio, Website, GitHub, or any URL/link questions
 - Return ONLY the URL itself (e.g., "https://linkedin.com/in/username")
@@ -362,7 +340,36 @@ CONFIDENCE RULES (MANDATORY):
 - confidence must be between 0.70 and 0.99
 - if inferred: 0.75–0.85
 - if directly supported by profile: 0.90–0.99
+"""
+
+
+def _options_block(options: Optional[List[str]]) -> str:
+    # IMPORTANT: Do NOT put the phrase "Free text input" anywhere.
+    if options and len(options) > 0:
+        return (
+            "\n\nAVAILABLE OPTIONS (CHOOSE EXACTLY ONE, COPY EXACTLY):\n"
+            + "\n".join([f"- {o}" for o in options])
+        )
+    return "\n\nThis question requires a written response."
+
+
+def _allowed_intents_block() -> str:
+    return "\n".join([f"- {i}" for i in sorted(ALLOWED_INTENTS)])
+
+
+def _build_prompt(request: AIRequest) -> str:
+    """Prompt for a single question."""
+    return f"""{PROMPT_PERSONA}
+USER PROFILE (may be incomplete):
+{profile_block(request.userProfile, [request.question])}
+
+QUESTION:
+{request.question}
+{_options_block(request.options)}
 
+ALLOWED INTENTS (MUST SELECT EXACTLY ONE):
+{_allowed_intents_block()}
+{PROMPT_RULES}
 RESPONSE FORMAT (JSON ONLY, NO EXTRA TEXT):
 {{
   "answer": "string",
@@ -372,87 +379,297 @@ RESPONSE FORMAT (JSON ONLY, NO EXTRA TEXT):
 }}
 """
 
-        body = json.dumps(
-            {
-                "inferenceConfig": {"max_new_tokens": 450},
-                "messages": [{"role": "user", "content": [{"text": prompt}]}],
-            }
-        )
 
-        model_id = "us.amazon.nova-lite-v1:0"
+def _build_batch_prompt(questions: List[BatchQuestion], user_profile: dict) -> str:
+    """Prompt that packs several questions of one form behind a single profile."""
+    question_blocks = "\n\n".join(
+        f"[{i}] {q.question}{_options_block(q.options)}"
+        for i, q in enumerate(questions, start=1)
+    )
+
+    return f"""{PROMPT_PERSONA}
+USER PROFILE (may be incomplete):
+{profile_block(user_profile, [q.question for q in questions])}
+
+QUESTIONS (ANSWER EVERY ONE, EACH ON ITS OWN):
+{question_blocks}
+
+ALLOWED INTENTS (MUST SELECT EXACTLY ONE PER QUESTION):
+{_allowed_intents_block()}
+{PROMPT_RULES}
+RESPONSE FORMAT (JSON ONLY, NO EXTRA TEXT, ONE ENTRY PER QUESTION NUMBER):
+{{
+  "answers": [
+    {{
+      "id": 1,
+      "answer": "string",
+      "confidence": 0.70,
+      "reasoning": "short practical reason why this helps hiring",
+      "intent": "one_allowed_intent"
+    }}
+  ]
+}}
+"""
+
+
+# -----------------------------
+# BEDROCK INVOCATION
+# -----------------------------
+
+def _has_credentials() -> bool:
+    return llm_backend.is_configured()
+
+
+def _invoke_model(prompt: str, max_new_tokens: int = 450, model_id: Optional[str] = None,
+                  deadline: Optional[float] = None, kind: str = "single") -> str:
+    """
+    Send one prompt to the LLM backend (Bedrock by default) and return the raw text of the reply.
+    Raises BedrockUnavailable when no reply can be had within the deadline.
+    """
+    model_id = model_id or llm_backend.default_model
+    return bedrock_guard.call(
+        f"{kind}:{model_id}", llm_backend.generate, prompt, max_new_tokens, model_id, deadline=deadline,
+    )
+
+
+def _invoke_model_stream(prompt: str, max_new_tokens: int = 450, model_id: Optional[str] = None) -> Iterator[str]:
+    """Send one prompt to the LLM backend and yield the reply text as it is generated."""
+    model_id = model_id or llm_backend.default_model
+    # Deadlines cover opening the stream, every chunk and the whole stream (no hedging)
+    yield from bedrock_guard.stream(
+        f"stream:{model_id}", llm_backend.generate_stream, prompt, max_new_tokens, model_id,
+    )
+
+
+class _AnswerStreamParser:
+    """Decodes the "answer" string of the model's JSON reply while it streams in."""
+
+    _ANSWER_KEY = re.compile(r'"answer"\s*:\s*"')
+    _ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f"}
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos: Optional[int] = None  # next undecoded character of the answer value
+        self.done = False
+
+    def feed(self, text: str) -> str:
+        """Add reply text; returns the newly decoded part of the answer (may be empty)."""
+        self._buffer += text
+        if self.done:
+            return ""
+        if self._pos is None:
+            match = self._ANSWER_KEY.search(self._buffer)
+            if not match:
+                return ""
+            self._pos = match.end()
+
+        buf, i, out = self._buffer, self._pos, []
+        while i < len(buf):
+            c = buf[i]
+            if c == '"':
+                self.done = True
+                i += 1
+                break
+            if c != "\\":
+                out.append(c)
+                i += 1
+                continue
+            # Escape sequence: wait until it is complete
+            if i + 1 >= len(buf):
+                break
+            if buf[i + 1] != "u":
+                out.append(self._ESCAPES.get(buf[i + 1], buf[i + 1]))
+                i += 2
+                continue
+            if i + 6 > len(buf):
+                break
+            try:
+                code = int(buf[i + 2:i + 6], 16)
+            except ValueError:
+                i += 6
+                continue
+            if 0xD800 <= code < 0xDC00:
+                # Surrogate pair: both halves are needed for one character
+                if i + 12 > len(buf):
+                    break
+                try:
+                    low = int(buf[i + 8:i + 12], 16) if buf[i + 6:i + 8] == "\\u" else None
+                except ValueError:
+                    low = None
+                if low is not None and 0xDC00 <= low < 0xE000:
+                    out.append(chr(0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)))
+                    i += 12
+                    continue
+                i += 6
+                continue
+            out.append(chr(code))
+            i += 6
+        self._pos = i
+        return "".join(out)
+
+
+def _parse_model_json(content_text: str) -> Any:
+    clean_text = content_text.replace("```json", "").replace("```", "").strip()
+    return json.loads(clean_text)
+
 
-        response = bedrock.invoke_model(
-            body=body,
-            modelId=model_id,
-            accept="application/json",
-            contentType="application/json",
+# -----------------------------
+# ANSWER VALIDATION
+# -----------------------------
+
+def _fallback_response(question: str, options: Optional[List[str]]) -> AIResponse:
+    """Hard fallback when the model reply cannot be used at all."""
+    intent, source = _normalize_intent(None, question)
+    ans = _repair_answer(question, options, intent)
+    return AIResponse(
+        answer=ans,
+        confidence=0.78,
+        reasoning="Fallback response due to formatting issue, optimized for job application success.",
+        intent=intent,
+        intentSource=source,
+    )
+
+
+def _finalize_answer(question: str, options: Optional[List[str]], ai_data: Dict[str, Any]) -> AIResponse:
+    """Apply the answer guarantees (no placeholders, exact options, allowed intent)."""
+    raw_answer = (ai_data.get("answer") or "").strip()
+    raw_conf = ai_data.get("confidence", 0.75)
+    raw_reason = (ai_data.get("reasoning") or "").strip()
+    raw_intent = ai_data.get("intent")
+
+    intent, source = _normalize_intent(raw_intent, question)
+
+    # Enforce confidence
+    try:
+        conf = float(raw_conf)
+    except Exception:
+        conf = 0.75
+    conf = max(0.70, min(conf, 0.99))
+
+    # If answer is forbidden/empty → repair
+    if _is_forbidden_answer(raw_answer):
+        repaired = _repair_answer(question, options, intent)
+        return AIResponse(
+            answer=repaired,
+            confidence=max(conf, 0.75),
+            reasoning="Repaired answer to avoid placeholders and improve hiring outcome.",
+            intent=intent,
+            intentSource=source,
         )
 
-        response_body = json.loads(response["body"].read())
-        content_text = response_body["output"]["message"]["content"][0]["text"]
+    # If options exist, enforce exact option match
+    if options and raw_answer not in options:
+        # Try to match loosely then return exact option
+        lower_map = {o.lower().strip(): o for o in options}
+        candidate = lower_map.get(raw_answer.lower().strip())
+        if candidate:
+            raw_answer = candidate
+        else:
+            raw_answer = _repair_answer(question, options, intent)
+            conf = max(conf, 0.75)
 
-        clean_text = content_text.replace("```json", "").replace("```", "").strip()
+    # Final safety: intent must be allowed
+    if intent not in ALLOWED_INTENTS:
+        intent = "unknown"
 
-        # Parse model JSON
-        try:
-            ai_data: Dict[str, Any] = json.loads(clean_text)
-        except json.JSONDecodeError:
-            # Hard fallback
-            intent = _normalize_intent(None, request.question)
-            ans = _repair_answer(request.question, request.options, intent)
-            return AIResponse(
-                answer=ans,
-                confidence=0.78,
-                reasoning="Fallback response due to formatting issue, optimized for job application success.",
-                intent=intent,
-            )
+    return AIResponse(
+        answer=raw_answer,
+        confidence=conf,
+        reasoning=raw_reason or "Answer chosen to maximize hiring chances while staying professional and ATS-safe.",
+        intent=intent,
+        intentSource=source,
+    )
+
+
+# -----------------------------
+# PREDICTION
+# -----------------------------
+
+def _unavailable_response(question: str, options: Optional[List[str]], reason: str) -> AIResponse:
+    """
+    Safe answer while Bedrock is unhealthy (pattern memory was already tried).
+    Confidence stays below MIN_CONFIDENCE_THRESHOLD so it is neither cached nor learned.
+    """
+    intent, source = _normalize_intent(None, question)
+    return AIResponse(
+        answer=_repair_answer(question, options, intent),
+        confidence=0.5,
+        reasoning=f"Bedrock unavailable ({reason}); fallback answer",
+        intent=intent,
+        intentSource=source,
+    )
 
-        raw_answer = (ai_data.get("answer") or "").strip()
-        raw_conf = ai_data.get("confidence", 0.75)
-        raw_reason = (ai_data.get("reasoning") or "").strip()
-        raw_intent = ai_data.get("intent")
 
-        intent = _normalize_intent(raw_intent, request.question)
+def _missing_credentials_response() -> AIResponse:
+    return AIResponse(
+        answer="",
+        confidence=0.0,
+        reasoning="AWS Credentials Missing",
+        intent="unknown",
+    )
 
-        # Enforce confidence
+
+def predict_answer(request: AIRequest) -> AIResponse:
+    """
+    Predict answer using AWS Bedrock (Amazon Nova)
+    """
+    try:
+        if not _has_credentials():
+            return _missing_credentials_response()
+
+        route = route_for(request.question, request.options, request.fieldType)
+        routing_stats.record(route)
+        content_text = _invoke_model(_build_prompt(request), route.max_new_tokens, route.model_id)
+
+        # Parse model JSON
         try:
-            conf = float(raw_conf)
-        except Exception:
-            conf = 0.75
-        conf = max(0.70, min(conf, 0.99))
-
-        # If answer is forbidden/empty → repair
-        if _is_forbidden_answer(raw_answer):
-            repaired = _repair_answer(request.question, request.options, intent)
-            return AIResponse(
-                answer=repaired,
-                confidence=max(conf, 0.75),
-                reasoning="Repaired answer to avoid placeholders and improve hiring outcome.",
-                intent=intent,
-            )
+            ai_data: Dict[str, Any] = _parse_model_json(content_text)
+        except json.JSONDecodeError:
+            return _fallback_response(request.question, request.options)
 
-        # If options exist, enforce exact option match
-        if request.options and raw_answer not in request.options:
-            # Try to match loosely then return exact option
-            lower_map = {o.lower().strip(): o for o in request.options}
-            candidate = lower_map.get(raw_answer.lower().strip())
-            if candidate:
-                raw_answer = candidate
-            else:
-                raw_answer = _repair_answer(request.question, request.options, intent)
-                conf = max(conf, 0.75)
-
-        # Final safety: intent must be allowed
-        if intent not in ALLOWED_INTENTS:
-            intent = "unknown"
+        return _finalize_answer(request.question, request.options, ai_data)
 
+    except BedrockUnavailable as e:
+        return _unavailable_response(request.question, request.options, str(e))
+    except Exception as e:
+        # Never crash
         return AIResponse(
-            answer=raw_answer,
-            confidence=conf,
-            reasoning=raw_reason or "Answer chosen to maximize hiring chances while staying professional and ATS-safe.",
-            intent=intent,
+            answer="",
+            confidence=0.0,
+            reasoning=f"AWS Error: {str(e)}",
+            intent="unknown",
         )
 
+
+def predict_answer_stream(request: AIRequest, emit: Callable[[str], None]) -> AIResponse:
+    """
+    predict_answer over Bedrock's response stream: emit() receives the answer
+    text as it is decoded; the returned (validated) response is authoritative.
+    """
+    try:
+        if not _has_credentials():
+            return _missing_credentials_response()
+
+        route = route_for(request.question, request.options, request.fieldType)
+        routing_stats.record(route)
+        parser = _AnswerStreamParser()
+        reply = []
+        for delta in _invoke_model_stream(_build_prompt(request), route.max_new_tokens, route.model_id):
+            reply.append(delta)
+            text = parser.feed(delta)
+            if text:
+                emit(text)
+
+        try:
+            ai_data: Dict[str, Any] = _parse_model_json("".join(reply))
+        except json.JSONDecodeError:
+            return _fallback_response(request.question, request.options)
+
+        return _finalize_answer(request.question, request.options, ai_data)
+
+    except BedrockUnavailable as e:
+        # Also when the stream broke off after some tokens (the final event voids them)
+        return _unavailable_response(request.question, request.options, str(e))
     except Exception as e:
         # Never crash
         return AIResponse(
@@ -461,3 +678,212 @@ RESPONSE FORMAT (JSON ONLY, NO EXTRA TEXT):
             reasoning=f"AWS Error: {str(e)}",
             intent="unknown",
         )
+
+
+def _predict_chunk(questions: List[BatchQuestion], user_profile: dict, route: Route) -> List[AIResponse]:
+    """Answer one chunk of same-route questions with a single Bedrock call."""
+    max_new_tokens = min(route.max_new_tokens * len(questions), config.BATCH_MAX_NEW_TOKENS)
+    routing_stats.record(route, len(questions))
+    content_text = _invoke_model(
+        _build_batch_prompt(questions, user_profile), max_new_tokens, route.model_id,
+        deadline=config.BEDROCK_BATCH_DEADLINE_SECONDS, kind="batch",
+    )
+
+    try:
+        parsed = _parse_model_json(content_text)
+    except json.JSONDecodeError:
+        parsed = {}
+
+    entries = parsed.get("answers", []) if isinstance(parsed, dict) else parsed
+    by_id: Dict[int, Dict[str, Any]] = {}
+    for entry in entries if isinstance(entries, list) else []:
+        try:
+            by_id[int(entry.get("id"))] = entry
+        except (AttributeError, TypeError, ValueError):
+            continue
+
+    responses = []
+    for i, q in enumerate(questions, start=1):
+        ai_data = by_id.get(i)
+        if ai_data is None:
+            # Model skipped or garbled this question
+            responses.append(_fallback_response(q.question, q.options))
+        else:
+            responses.append(_finalize_answer(q.question, q.options, ai_data))
+    return responses
+
+
+def _predict_chunk_safe(questions: List[BatchQuestion], user_profile: dict, route: Route) -> List[AIResponse]:
+    try:
+        return _predict_chunk(questions, user_profile, route)
+    except BedrockUnavailable as e:
+        return [_unavailable_response(q.question, q.options, str(e)) for q in questions]
+    except Exception as e:
+        # Never crash; a failed chunk only affects its own questions
+        return [
+            AIResponse(answer="", confidence=0.0, reasoning=f"AWS Error: {str(e)}", intent="unknown")
+            for _ in questions
+        ]
+
+
+def _route_chunks(questions: List[BatchQuestion], indexes: List[int]) -> List[Tuple[Route, List[int]]]:
+    """
+    Question indexes grouped by route, each group split into BATCH_CHUNK_SIZE chunks.
+    Required questions come first, so they share chunks that are queued ahead.
+    """
+    groups: Dict[str, Tuple[Route, List[int]]] = {}
+    for i in sorted(indexes, key=lambda i: not questions[i].required):
+        q = questions[i]
+        route = route_for(q.question, q.options, q.fieldType)
+        groups.setdefault(route.name, (route, []))[1].append(i)
+
+    chunk_size = max(1, config.BATCH_CHUNK_SIZE)
+    return [
+        (route, group[start:start + chunk_size])
+        for route, group in groups.values()
+        for start in range(0, len(group), chunk_size)
+    ]
+
+
+def predict_batch(questions: List[BatchQuestion], user_profile: dict) -> List[AIResponse]:
+    """
+    Predict answers for several questions of the same form.
+    Questions are grouped by route and packed into chunks of BATCH_CHUNK_SIZE, one Bedrock call per chunk.
+    Returned list is aligned with `questions`.
+    """
+    if not _has_credentials():
+        return [_missing_credentials_response() for _ in questions]
+
+    responses: List[Optional[AIResponse]] = [None] * len(questions)
+    for route, chunk_indexes in _route_chunks(questions, list(range(len(questions)))):
+        answers = _predict_chunk_safe([questions[i] for i in chunk_indexes], user_profile, route)
+        for i, response in zip(chunk_indexes, answers):
+            responses[i] = response
+    return responses
+
+
+# -----------------------------
+# ASYNC PREDICTION (event-loop safe)
+# -----------------------------
+
+async def predict_answer_async(request: AIRequest) -> AIResponse:
+    """
+    predict_answer on the inference pool, so the event loop never blocks on Bedrock.
+    Answers are cached per (question, options, fieldType, profile), and identical
+    requests arriving while one is in flight share its Bedrock call.
+    """
+    key = prediction_key(
+        request.question, request.options, request.fieldType,
+        profile_fingerprint(request.userProfile),
+    )
+    cached = prediction_cache.get(key)
+    if cached is not None:
+        return cached
+
+    async def _call() -> AIResponse:
+        response = await inference_pool.run(predict_answer, request, priority=priority_for(request.required))
+        prediction_cache.put(key, response)
+        return response
+
+    response = await prediction_flights.run(key, _call)
+    # Followers get their own copy
+    return response.model_copy()
+
+
+async def predict_batch_async(questions: List[BatchQuestion], user_profile: dict) -> List[AIResponse]:
+    """
+    predict_batch with every chunk sent to Bedrock concurrently through the inference pool.
+    Cached answers are reused and questions already in flight (from any request) are
+    awaited; only the remaining questions are sent.
+    """
+    if not _has_credentials():
+        return [_missing_credentials_response() for _ in questions]
+
+    fingerprint = profile_fingerprint(user_profile)
+    keys = [prediction_key(q.question, q.options, q.fieldType, fingerprint) for q in questions]
+    responses: List[Optional[AIResponse]] = [prediction_cache.get(key) for key in keys]
+
+    flights: Dict[int, asyncio.Future] = {}
+    missing: List[int] = []
+    first_of: Dict[str, int] = {}
+    duplicates: List[int] = []
+    for i, response in enumerate(responses):
+        if response is not None:
+            continue
+        flight = prediction_flights.join(keys[i])
+        if flight is not None:
+            flights[i] = flight
+        elif keys[i] in first_of:
+            # Same question twice in one form: answered by the first one's call
+            duplicates.append(i)
+        else:
+            first_of[keys[i]] = i
+            missing.append(i)
+
+    async def _call(route: Route, chunk_indexes: List[int]) -> List[AIResponse]:
+        chunk = [questions[i] for i in chunk_indexes]
+        priority = priority_for(any(q.required for q in chunk))
+        answers = await inference_pool.run(_predict_chunk_safe, chunk, user_profile, route, priority=priority)
+        for i, response in zip(chunk_indexes, answers):
+            prediction_cache.put(keys[i], response)
+        return answers
+
+    for route, chunk_indexes in _route_chunks(questions, missing):
+        futures = prediction_flights.lead_many([keys[i] for i in chunk_indexes], _call(route, chunk_indexes))
+        flights.update(zip(chunk_indexes, futures))
+
+    for i in duplicates:
+        flights[i] = flights[first_of[keys[i]]]
+
+    pending = list(flights.items())
+    results = await asyncio.gather(*(asyncio.shield(f) for _, f in pending))
+    for (i, _), response in zip(pending, results):
+        responses[i] = response.model_copy()
+    return responses
+
+
+def tokens_void(streamed: str, response: AIResponse) -> bool:
+    """True if streamed tokens are not the final answer (stream broke off, or validation changed it)"""
+    return bool(streamed) and streamed != response.answer
+
+
+async def predict_answer_events(request: AIRequest) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    ("token", text) events while the answer streams in, then ("final", AIResponse).
+    A cached answer is sent as the final event straight away.
+    Callers must drop the streamed text when the final answer differs (see tokens_void).
+    """
+    key = prediction_key(
+        request.question, request.options, request.fieldType,
+        profile_fingerprint(request.userProfile),
+    )
+    cached = prediction_cache.get(key)
+    if cached is not None:
+        yield "final", cached
+        return
+
+    loop = asyncio.get_running_loop()
+    tokens: asyncio.Queue = asyncio.Queue()
+
+    def _emit(text: str):
+        loop.call_soon_threadsafe(tokens.put_nowait, text)
+
+    async def _call() -> AIResponse:
+        try:
+            response = await inference_pool.run(
+                predict_answer_stream, request, _emit, priority=priority_for(request.required),
+            )
+            prediction_cache.put(key, response)
+            return response
+        finally:
+            # Queued after every token emitted by the worker
+            loop.call_soon_threadsafe(tokens.put_nowait, None)
+
+    # Keeps running (and fills the cache) if the client goes away mid-stream
+    task = asyncio.ensure_future(_call())
+    while True:
+        text = await tokens.get()
+        if text is None:
+            break
+        yield "token", text
+    yield "final", await task
@@ -503,20 +503,40 @@ Combines AI predictions, pattern learning, and user data management
 Port: 8001
 """
 
-from fastapi import FastAPI, HTTPException, File, UploadFile
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, File, UploadFile, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from dotenv import load_dotenv
+from typing import Iterable, Iterator, List, Optional
+import json
 import logging
 
 from models import (
-    AIRequest, AIResponse, Pattern, PatternUploadRequest,
-    UserProfile
+    AIRequest, AIResponse, AIBatchRequest, AIBatchResponse,
+    Pattern, PatternUploadRequest, UserProfile
 )
 
 from config import config
 
-from ai_service import predict_answer, ALLOWED_INTENTS
-from pattern_service import search_pattern, save_pattern, get_stats, read_patterns
+from ai_service import predict_answer_async, predict_answer_events, predict_batch_async, tokens_void, ALLOWED_INTENTS
+from llm_backend import llm_backend
+from bedrock_guard import bedrock_guard
+from inference_pool import inference_pool
+from adaptive_limiter import bedrock_limiter
+from prediction_cache import prediction_cache
+from single_flight import prediction_flights
+from profile_projection import projection_stats
+from model_router import routing_stats
+from profile_resolver import resolve as resolve_from_profile, resolver_stats
+from intent_classifier import intent_classifier
+from vector_index import vector_index
+from pattern_store import pattern_store
+from response_cache import response_cache
+from pattern_service import (
+    search_pattern, search_patterns, save_pattern, get_stats, iter_patterns, get_revision
+)
 from resume_service import save_user_profile, get_user_profile
 
 
@@ -528,10 +548,26 @@ logging.basicConfig(
 )
 logger = logging.getLogger("ai-service")
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    llm_backend.start()
+    pattern_store.start()
+    vector_index.start()
+    intent_classifier.start()
+    yield
+    inference_pool.shutdown()
+    bedrock_guard.shutdown()
+    llm_backend.close()
+    vector_index.close()
+    pattern_store.close()
+
+
 app = FastAPI(
     title="AI Service",
     description="Unified AI prediction, pattern learning, and user data service",
     version="3.0.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -543,55 +579,53 @@ app.add_middleware(
 )
 
 
-@app.post("/predict", response_model=AIResponse)
-async def predict(request: AIRequest):
-    """
-    1) Pattern Memory
-    2) AI (Bedrock)
-    3) Save pattern if valid
-    """
-    logger.info(f"🧠 Prediction requested: {request.question}")
+def _memory_answer(question: str) -> AIResponse | None:
+    """Answer from Pattern Memory, or None if there is no usable match."""
+    memory_match = search_pattern(question)
+    if not memory_match:
+        return None
 
-    # 1) Memory first
-    memory_match = search_pattern(request.question)
-    if memory_match:
-        mappings = memory_match.get("answerMappings", [])
-        answer = ""
-        if mappings:
-            variants = mappings[0].get("variants", [])
-            answer = variants[0] if variants else mappings[0].get("canonicalValue", "")
-
-        if answer:
-            return AIResponse(
-                answer=answer,
-                confidence=config.PATTERN_MEMORY_CONFIDENCE,
-                reasoning="Retrieved from Pattern Memory",
-                intent=memory_match.get("intent") or "unknown",
-            )
+    mappings = memory_match.get("answerMappings", [])
+    answer = ""
+    if mappings:
+        variants = mappings[0].get("variants", [])
+        answer = variants[0] if variants else mappings[0].get("canonicalValue", "")
 
-    # 2) AI fallback
-    ai_response = predict_answer(request)
+    if not answer:
+        return None
 
-    # 3) Save learned pattern (only if safe)
+    return AIResponse(
+        answer=answer,
+        confidence=config.PATTERN_MEMORY_CONFIDENCE,
+        reasoning="Retrieved from Pattern Memory",
+        intent=memory_match.get("intent") or "unknown",
+    )
+
+
+def _learn_pattern(question: str, options: list | None, field_type: str, ai_response: AIResponse):
+    """Save an AI answer as a pattern (only if safe)."""
     can_save = (
         bool(ai_response.answer)
         and ai_response.confidence >= 0.70
         and (ai_response.intent in ALLOWED_INTENTS)
         and (ai_response.intent != "unknown")
+        # Local classifier guesses stay out of pattern memory (it is retrained from there)
+        and (ai_response.intentSource != "classifier")
     )
 
     if can_save:
         try:
             pattern = Pattern(
-                questionPattern=request.question.lower().strip(),
+                questionPattern=question.lower().strip(),
                 intent=ai_response.intent,
-                fieldType=request.fieldType,
+                fieldType=field_type,
                 confidence=ai_response.confidence,
                 source="AI",
+                intentSource=ai_response.intentSource,
                 answerMappings=[{
                     "canonicalValue": ai_response.answer,
                     "variants": [ai_response.answer],
-                    "contextOptions": request.options or []
+                    "contextOptions": options or []
                 }],
             )
             save_pattern(pattern)
@@ -603,15 +637,115 @@ async def predict(request: AIRequest):
             f"🚫 Not saving pattern (answer/intents not safe). intent={ai_response.intent}, conf={ai_response.confidence}"
         )
 
+
+@app.post("/predict", response_model=AIResponse)
+async def predict(request: AIRequest):
+    """
+    0) Direct profile lookup (name, email, phone, ...)
+    1) Pattern Memory
+    2) AI (Bedrock)
+    3) Save pattern if valid
+    """
+    logger.info(f"🧠 Prediction requested: {request.question}")
+
+    # 0) Fields the profile answers directly
+    profile_response = resolve_from_profile(request.question, request.options, request.userProfile)
+    if profile_response:
+        return profile_response
+
+    # 1) Memory first
+    memory_response = await run_in_threadpool(_memory_answer, request.question)
+    if memory_response:
+        return memory_response
+
+    # 2) AI fallback (runs on the inference pool, never on the event loop)
+    ai_response = await predict_answer_async(request)
+
+    # 3) Save learned pattern (only if safe)
+    await run_in_threadpool(_learn_pattern, request.question, request.options, request.fieldType, ai_response)
+
     return ai_response
 
 
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.post("/predict/stream")
+async def predict_stream(request: AIRequest):
+    """
+    Same steps as /predict, as Server-Sent Events:
+    "token" events carry answer text as Bedrock generates it,
+    one "final" event carries the validated AIResponse.
+    """
+    logger.info(f"🧠 Streaming prediction requested: {request.question}")
+
+    async def _events():
+        # Profile and memory answers are complete at once
+        response = resolve_from_profile(request.question, request.options, request.userProfile)
+        if response is None:
+            response = await run_in_threadpool(_memory_answer, request.question)
+        if response is not None:
+            yield _sse("final", response.model_dump())
+            return
+
+        streamed = []
+        async for event, data in predict_answer_events(request):
+            if event == "token":
+                streamed.append(data)
+                yield _sse("token", {"text": data})
+            else:
+                # tokensVoid: the client must replace the streamed text with this answer
+                yield _sse("final", dict(data.model_dump(), tokensVoid=tokens_void("".join(streamed), data)))
+                await run_in_threadpool(_learn_pattern, request.question, request.options, request.fieldType, data)
+
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/predict/batch", response_model=AIBatchResponse)
+async def predict_batch_endpoint(request: AIBatchRequest):
+    """
+    Whole form in one call:
+    0) Direct profile lookup per question
+    1) Pattern Memory per question
+    2) Remaining questions packed into chunked Bedrock prompts
+    3) Save patterns if valid
+    """
+    logger.info(f"🧠 Batch prediction requested: {len(request.questions)} questions")
+
+    answers: list[AIResponse | None] = [None] * len(request.questions)
+    pending = []
+    for i, q in enumerate(request.questions):
+        answers[i] = resolve_from_profile(q.question, q.options, request.userProfile)
+        if answers[i] is None:
+            answers[i] = await run_in_threadpool(_memory_answer, q.question)
+        if answers[i] is None:
+            pending.append(i)
+
+    logger.info(f"📦 Profile/memory hits: {len(request.questions) - len(pending)}, sent to AI: {len(pending)}")
+
+    if pending:
+        ai_responses = await predict_batch_async([request.questions[i] for i in pending], request.userProfile)
+        for i, ai_response in zip(pending, ai_responses):
+            q = request.questions[i]
+            await run_in_threadpool(_learn_pattern, q.question, q.options, q.fieldType, ai_response)
+            answers[i] = ai_response
+
+    return AIBatchResponse(answers=answers)
+
+
 # ---------------- PATTERNS ----------------
 
 @app.post("/api/patterns/upload")
 async def upload_pattern(req: PatternUploadRequest):
     try:
-        success = save_pattern(req.pattern)
+        # Takes the store lock (and the cross-process file lock): keep it off the event loop
+        success = await run_in_threadpool(save_pattern, req.pattern)
         if success:
             return {"success": True, "message": "Pattern uploaded successfully"}
         return {"success": False, "error": "Pattern rejected"}
@@ -620,27 +754,118 @@ async def upload_pattern(req: PatternUploadRequest):
 
 
 @app.get("/api/patterns/search")
-async def search_patterns(q: str):
+async def search_patterns_endpoint(q: str, k: int = 1):
     if not q:
         raise HTTPException(status_code=400, detail="Query required")
 
-    match = search_pattern(q)
-    return {"success": True, "matches": [match] if match else []}
+    k = max(1, min(k, config.MAX_SEARCH_RESULTS))
+    # Top-k scoring, FTS queries and the vector search run on the threadpool
+    matches = await run_in_threadpool(search_patterns, q, k)
+    return {
+        "success": True,
+        "matches": [{**pattern, "score": round(score, 4)} for score, pattern in matches],
+    }
 
 
 @app.get("/api/patterns/stats")
-async def pattern_stats():
+async def pattern_stats(request: Request):
+    """ETag is the store revision; an unchanged store answers If-None-Match with 304"""
     try:
-        return {"success": True, "stats": get_stats()}
+        return await response_cache.respond(
+            request, "stats", get_revision,
+            lambda revision: {"success": True, "stats": get_stats()},
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _sync_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """`fields=questionPattern,intent` -> projection list; `id` is always kept so deltas can be merged"""
+    if not fields:
+        return None
+    names = [f.strip() for f in fields.split(",") if f.strip()]
+    return ["id"] + [f for f in dict.fromkeys(names) if f != "id"]
+
+
+def _project(pattern: dict, fields: Optional[List[str]]) -> dict:
+    if fields is None:
+        return pattern
+    return {f: pattern[f] for f in fields if f in pattern}
+
+
+def _sync_payload(patterns: Iterable[dict], cursor: int, full: bool,
+                  fields: Optional[List[str]] = None) -> dict:
+    patterns = [_project(p, fields) for p in patterns]
+    return {
+        "success": True,
+        "patterns": patterns,
+        "total": len(patterns),
+        "cursor": str(cursor),
+        "full": full,
+    }
+
+
+def _ndjson_lines(patterns: Iterator[dict], cursor: int, full: bool,
+                  fields: Optional[List[str]]) -> Iterator[bytes]:
+    """
+    One pattern per line, written in chunks of SYNC_STREAM_BATCH_SIZE.
+    The last line is a {"done": true, ...} trailer so clients can detect truncated streams.
+    """
+    batch = []
+    total = 0
+    for pattern in patterns:
+        batch.append(json.dumps(_project(dict(pattern), fields), separators=(',', ':')))
+        total += 1
+        if len(batch) >= config.SYNC_STREAM_BATCH_SIZE:
+            yield ("\n".join(batch) + "\n").encode()
+            batch = []
+    trailer = {"done": True, "total": total, "cursor": str(cursor), "full": full}
+    batch.append(json.dumps(trailer, separators=(',', ':')))
+    yield ("\n".join(batch) + "\n").encode()
+
+
 @app.get("/api/patterns/sync")
-async def sync_patterns(since: str = None):
+async def sync_patterns(request: Request, since: str = None, format: str = "json",
+                        fields: str = None):
+    """
+    Full sync without `since`; otherwise only patterns created/updated after it.
+    `since` is the `cursor` of the previous response (legacy clients may send an ISO timestamp).
+    Full and cursor syncs carry a revision ETag and are served from the response cache.
+    `format=ndjson` streams one pattern per line instead; `fields` limits the keys returned.
+    """
     try:
-        patterns = read_patterns()
-        return {"success": True, "patterns": patterns, "total": len(patterns)}
+        cursor = get_revision()
+        projection = _sync_fields(fields)
+
+        if since is None or since.isdigit():
+            revision = int(since) if since is not None else None
+            patterns = lambda: iter_patterns(revision)
+        else:
+            patterns = lambda: (
+                p for p in iter_patterns()
+                if (p.get("lastUsed") or p.get("createdAt") or "") > since
+            )
+
+        if format == "ndjson":
+            return StreamingResponse(
+                _ndjson_lines(patterns(), cursor, since is None, projection),
+                media_type="application/x-ndjson",
+                headers={"X-Sync-Cursor": str(cursor)},
+            )
+        if format != "json":
+            raise HTTPException(status_code=400, detail="format must be json or ndjson")
+
+        if since is None or since.isdigit():
+            name = f"sync-{since}" if since is not None else "sync"
+            if projection:
+                name += ":" + "+".join(projection)
+            return await response_cache.respond(
+                request, name, get_revision,
+                lambda revision: _sync_payload(patterns(), revision, since is None, projection),
+            )
+        return _sync_payload(patterns(), cursor, False, projection)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -685,10 +910,24 @@ async def health_check():
         "version": "3.0.0",
         "endpoints": {
             "ai": "/predict",
+            "ai_batch": "/predict/batch",
+            "ai_stream": "/predict/stream",
             "patterns": "/api/patterns/*",
             "users": "/api/user-data/*",
             "resume": "/parse-resume",
-        }
+        },
+        "llm": llm_backend.stats(),
+        "inference": inference_pool.stats(),
+        "concurrency": bedrock_limiter.stats(),
+        "bedrock": bedrock_guard.stats(),
+        "responseCache": response_cache.stats(),
+        "predictionCache": prediction_cache.stats(),
+        "coalescing": prediction_flights.stats(),
+        "profileProjection": projection_stats.stats(),
+        "routing": routing_stats.stats(),
+        "profileResolver": resolver_stats.stats(),
+        "intentClassifier": intent_classifier.stats(),
+        "vectorIndex": vector_index.stats(),
     }
 
 
@@ -0,0 +1,64 @@
+"""
+Bedrock Client - Long-lived, pooled bedrock-runtime client
+Created once at startup and shared by all inference threads
+"""
+import threading
+
+import boto3
+from botocore.config import Config as BotocoreConfig
+
+from config import config
+
+
+class BedrockClientManager:
+    """Owns the single bedrock-runtime client (boto3 clients are thread-safe)"""
+
+    def __init__(self):
+        self._client = None
+        self._lock = threading.Lock()
+        self.model_id = config.BEDROCK_MODEL_ID
+
+    def has_credentials(self) -> bool:
+        return bool(config.AWS_ACCESS_KEY_ID and config.AWS_SECRET_ACCESS_KEY)
+
+    def _create_client(self):
+        client_config = BotocoreConfig(
+            region_name=config.AWS_REGION,
+            max_pool_connections=config.BEDROCK_MAX_POOL_CONNECTIONS,
+            connect_timeout=config.BEDROCK_CONNECT_TIMEOUT,
+            # A read past the longest guard deadline has no caller left to answer
+            read_timeout=min(config.BEDROCK_READ_TIMEOUT, config.BEDROCK_MAX_DEADLINE_SECONDS),
+            tcp_keepalive=True,
+            retries={"max_attempts": config.BEDROCK_MAX_ATTEMPTS, "mode": "standard"},
+        )
+        return boto3.client(
+            service_name="bedrock-runtime",
+            region_name=config.AWS_REGION,
+            aws_access_key_id=config.AWS_ACCESS_KEY_ID,
+            aws_secret_access_key=config.AWS_SECRET_ACCESS_KEY,
+            config=client_config,
+        )
+
+    def start(self):
+        """Create the client up front (called on app startup)."""
+        if self.has_credentials():
+            self.get_client()
+
+    def get_client(self):
+        """Shared client, created on first use if start() was not called."""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._create_client()
+        return self._client
+
+    def close(self):
+        with self._lock:
+            client = self._client
+            self._client = None
+        if client is not None:
+            client.close()
+
+
+# Global client manager
+bedrock_manager = BedrockClientManager()
@@ -0,0 +1,379 @@
+"""
+Bedrock Guard - Deadlines, hedging, throttling backoff and a circuit breaker
+Every Bedrock call runs through BedrockGuard.call(): it gets a deadline,
+optionally a second (hedged) request once it is slower than the recent p95,
+jittered exponential backoff on throttling, and fails fast while the
+circuit breaker is open. BedrockGuard.stream() does the same for response
+streams and also bounds every chunk and the whole iteration.
+"""
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FuturesTimeout
+from typing import Any, Callable, Deque, Dict, Iterator, Optional, Tuple
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+from adaptive_limiter import bedrock_limiter
+from config import config
+
+logger = logging.getLogger("ai-service")
+
+THROTTLING_CODES = {
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "ServiceQuotaExceededException",
+    "ServiceUnavailableException",
+    "ModelNotReadyException",
+}
+
+
+class BedrockUnavailable(Exception):
+    """Bedrock was not (or could not be) asked in time: breaker open, deadline hit, still throttled"""
+
+
+class _DeadlineExceeded(Exception):
+    pass
+
+
+def is_throttling(error: Exception) -> bool:
+    return isinstance(error, ClientError) and error.response.get("Error", {}).get("Code") in THROTTLING_CODES
+
+
+def _is_unhealthy(error: Exception) -> bool:
+    """Errors that say something about Bedrock's health (not about our request)"""
+    if isinstance(error, ClientError):
+        status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode") or 0
+        return is_throttling(error) or status >= 500
+    # Connection errors, read/connect timeouts
+    return isinstance(error, BotoCoreError)
+
+
+# -----------------------------
+# LATENCY (hedge delay)
+# -----------------------------
+
+class LatencyWindow:
+    """Recent successful call latencies per kind of call"""
+
+    def __init__(self, size: int):
+        self._samples: Dict[str, Deque[float]] = {}
+        self._size = size
+        self._lock = threading.Lock()
+
+    def record(self, kind: str, seconds: float):
+        with self._lock:
+            self._samples.setdefault(kind, deque(maxlen=self._size)).append(seconds)
+
+    def percentile(self, kind: str, p: float) -> Optional[float]:
+        """p-th percentile, or None until BEDROCK_HEDGE_MIN_SAMPLES calls were seen"""
+        with self._lock:
+            samples = sorted(self._samples.get(kind, ()))
+        if len(samples) < max(1, config.BEDROCK_HEDGE_MIN_SAMPLES):
+            return None
+        return samples[min(len(samples) - 1, int(p * len(samples)))]
+
+
+# -----------------------------
+# CIRCUIT BREAKER
+# -----------------------------
+
+class CircuitBreaker:
+    """
+    closed -> open after `failure_threshold` consecutive unhealthy errors;
+    open -> half_open after `reset_seconds`, letting one probe call through;
+    the probe's outcome closes or re-opens it
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self.trips = 0
+        self.short_circuited = 0
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._state == "open" and time.monotonic() - self._opened_at >= self.reset_seconds:
+                self._state = "half_open"
+                self._probing = False
+            if self._state == "closed":
+                return True
+            if self._state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            self.short_circuited += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self._state != "closed":
+                logger.info("✅ Bedrock circuit closed")
+            self._state = "closed"
+            self._failures = 0
+            self._probing = False
+
+    def release_probe(self):
+        """The probe ended without telling anything about Bedrock (caller went away): allow another"""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._state == "half_open" or (
+                self._state == "closed" and self._failures >= self.failure_threshold
+            ):
+                self._state = "open"
+                self._opened_at = time.monotonic()
+                self.trips += 1
+                logger.warning(
+                    f"⛔ Bedrock circuit open after {self._failures} failures, "
+                    f"retrying in {self.reset_seconds:.0f}s"
+                )
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == "open" and time.monotonic() - self._opened_at >= self.reset_seconds:
+                return "half_open"
+            return self._state
+
+    def stats(self) -> dict:
+        state = self.state
+        with self._lock:
+            retry_in = (
+                max(0.0, self.reset_seconds - (time.monotonic() - self._opened_at))
+                if state == "open" else 0.0
+            )
+            return {
+                "state": state,
+                "consecutiveFailures": self._failures,
+                "failureThreshold": self.failure_threshold,
+                "retryInSeconds": round(retry_in, 1),
+                "trips": self.trips,
+                "shortCircuited": self.short_circuited,
+            }
+
+
+# -----------------------------
+# GUARDED CALLS
+# -----------------------------
+
+class BedrockGuard:
+    """Wraps blocking Bedrock calls (called from inference threads)"""
+
+    def __init__(self):
+        self.breaker = CircuitBreaker(config.BREAKER_FAILURE_THRESHOLD, config.BREAKER_RESET_SECONDS)
+        self.latency = LatencyWindow(config.BEDROCK_LATENCY_WINDOW)
+        # Attempts run here so the caller can stop waiting at the deadline (or hedge).
+        # An abandoned attempt holds its thread until BEDROCK_READ_TIMEOUT, so besides
+        # the calls in flight and their hedges the pool has room for as many abandoned ones
+        self.max_workers = 3 * max(1, config.PREDICTION_WORKERS, bedrock_limiter.max_limit)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bedrock")
+        self._lock = threading.Lock()
+        self._running = 0
+        self.saturated = 0
+        self.calls = 0
+        self.retries = 0
+        self.throttled = 0
+        self.deadline_exceeded = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.stream_failures = 0
+
+    def _count(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    @staticmethod
+    def _timed(fn: Callable[..., Any], args: tuple) -> Tuple[float, Any]:
+        start = time.monotonic()
+        result = fn(*args)
+        return time.monotonic() - start, result
+
+    def _submit(self, fn: Callable[..., Any], *args) -> Future:
+        """Run on the guard's pool, counting threads busy (including abandoned attempts)"""
+        with self._lock:
+            self._running += 1
+        future = self._executor.submit(fn, *args)
+        future.add_done_callback(self._finished)
+        return future
+
+    def _finished(self, _future: Future):
+        with self._lock:
+            self._running -= 1
+
+    @property
+    def running(self) -> int:
+        with self._lock:
+            return self._running
+
+    def _attempt(self, kind: str, fn: Callable[..., Any], args: tuple, deadline_at: float, hedge: bool) -> Any:
+        """One request (plus at most one hedge) that must finish before deadline_at"""
+        futures = [self._submit(self._timed, fn, args)]
+        hedge_delay = self.latency.percentile(kind, 0.95) if hedge and config.BEDROCK_HEDGING else None
+
+        if hedge_delay is not None:
+            hedge_delay = max(hedge_delay, config.BEDROCK_HEDGE_MIN_DELAY)
+            done, _ = wait(futures, timeout=max(0.0, min(hedge_delay, deadline_at - time.monotonic())))
+            # No hedge once half the pool is busy: slow attempts are then tying up threads
+            if (not done and deadline_at - time.monotonic() > 0 and self.breaker.state == "closed"
+                    and self.running < self.max_workers // 2):
+                self._count("hedges")
+                futures.append(self._submit(self._timed, fn, args))
+
+        pending = set(futures)
+        error: Optional[Exception] = None
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, deadline_at - time.monotonic()),
+                                 return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                if future.exception() is not None:
+                    error = future.exception()
+                    continue
+                elapsed, result = future.result()
+                typical = self.latency.percentile(kind, 0.5)
+                bedrock_limiter.on_success(
+                    latency_spike=typical is not None and elapsed > config.AIMD_LATENCY_SPIKE_FACTOR * typical
+                )
+                self.latency.record(kind, elapsed)
+                if len(futures) > 1 and future is futures[1]:
+                    self._count("hedge_wins")
+                return result
+
+        if error is not None and not pending:
+            raise error
+        self._count("deadline_exceeded")
+        raise _DeadlineExceeded(f"no reply within the {kind} deadline")
+
+    def call(self, kind: str, fn: Callable[..., Any], *args,
+             deadline: Optional[float] = None, hedge: bool = True) -> Any:
+        """
+        fn(*args) under a deadline (seconds, default BEDROCK_DEADLINE_SECONDS).
+        kind groups calls with similar latency for the hedge delay.
+        Raises BedrockUnavailable instead of waiting on an unhealthy Bedrock.
+        """
+        return self._call(kind, fn, args, deadline, hedge, settle=True)
+
+    def _call(self, kind: str, fn: Callable[..., Any], args: tuple,
+              deadline: Optional[float], hedge: bool, settle: bool) -> Any:
+        """settle=False leaves recording the success to the caller (streams: once fully read)"""
+        self._count("calls")
+        deadline_at = time.monotonic() + (deadline or config.BEDROCK_DEADLINE_SECONDS)
+        attempt = 0
+        while True:
+            if self.running >= self.max_workers:
+                # Every thread is held by a (mostly abandoned) slow attempt: queueing here
+                # would only burn the deadline, so shed the call and lower the limit
+                self._count("saturated")
+                bedrock_limiter.on_overload()
+                raise BedrockUnavailable("all Bedrock threads busy")
+            if not self.breaker.allow():
+                raise BedrockUnavailable("circuit breaker open")
+            try:
+                result = self._attempt(kind, fn, args, deadline_at, hedge)
+            except _DeadlineExceeded as e:
+                self.breaker.record_failure()
+                bedrock_limiter.on_overload()
+                raise BedrockUnavailable(str(e)) from e
+            except Exception as e:
+                if not _is_unhealthy(e):
+                    # Bedrock answered (e.g. a validation error), so it is up
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                if not is_throttling(e):
+                    raise
+                self._count("throttled")
+                bedrock_limiter.on_overload()
+                attempt += 1
+                # Full jitter: spreads retries of concurrent callers apart
+                delay = random.uniform(0, min(config.BEDROCK_BACKOFF_MAX, config.BEDROCK_BACKOFF_BASE * 2 ** attempt))
+                if attempt > config.BEDROCK_THROTTLE_RETRIES or time.monotonic() + delay >= deadline_at:
+                    raise BedrockUnavailable(f"throttled ({e.response['Error']['Code']})") from e
+                self._count("retries")
+                time.sleep(delay)
+                continue
+            if settle:
+                self.breaker.record_success()
+            return result
+
+    def stream(self, kind: str, fn: Callable[..., Iterator[str]], *args) -> Iterator[str]:
+        """
+        Yields from the iterator fn(*args) returns. Opening it goes through call() (no hedging);
+        each chunk must then arrive within BEDROCK_STREAM_CHUNK_TIMEOUT and the whole stream
+        within BEDROCK_STREAM_DEADLINE_SECONDS. A stream that breaks off counts as a breaker
+        failure and raises BedrockUnavailable.
+        """
+        deadline_at = time.monotonic() + config.BEDROCK_STREAM_DEADLINE_SECONDS
+        chunks = self._call(kind, fn, args, None, hedge=False, settle=False)
+        settled = False
+        try:
+            # An abandoned next() ends at BEDROCK_READ_TIMEOUT at the latest
+            while True:
+                timeout = min(config.BEDROCK_STREAM_CHUNK_TIMEOUT, deadline_at - time.monotonic())
+                future = self._submit(next, chunks, None)
+                try:
+                    chunk = future.result(timeout=max(0.0, timeout))
+                except FuturesTimeout as e:
+                    settled = True
+                    self._count("deadline_exceeded")
+                    self._stream_failed()
+                    bedrock_limiter.on_overload()
+                    raise BedrockUnavailable(f"no {kind} chunk within the deadline") from e
+                except Exception as e:
+                    settled = True
+                    self._stream_failed()
+                    if is_throttling(e):
+                        bedrock_limiter.on_overload()
+                    raise BedrockUnavailable(f"stream interrupted ({e})") from e
+                if chunk is None:
+                    settled = True
+                    self.breaker.record_success()
+                    return
+                yield chunk
+        finally:
+            if not settled:
+                # Closed by the consumer (e.g. the SSE client went away): a half-open
+                # probe must not stay claimed, or every later call short-circuits
+                self.breaker.release_probe()
+
+    def _stream_failed(self):
+        self._count("stream_failures")
+        self.breaker.record_failure()
+
+    def stats(self) -> dict:
+        return {
+            "breaker": self.breaker.stats(),
+            "deadlineSeconds": config.BEDROCK_DEADLINE_SECONDS,
+            "streamDeadlineSeconds": config.BEDROCK_STREAM_DEADLINE_SECONDS,
+            "streamFailures": self.stream_failures,
+            "calls": self.calls,
+            "throttled": self.throttled,
+            "retries": self.retries,
+            "deadlineExceeded": self.deadline_exceeded,
+            "threads": {"busy": self.running, "max": self.max_workers, "saturated": self.saturated},
+            "hedging": {
+                "enabled": config.BEDROCK_HEDGING,
+                "hedges": self.hedges,
+                "hedgeWins": self.hedge_wins,
+            },
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Global guard
+bedrock_guard = BedrockGuard()
@@ -0,0 +1,551 @@
+"""
+Benchmark - Pattern store and /predict performance at realistic scale
+Generates synthetic pattern stores (1k / 100k / 1M questions), measures
+search_pattern, save_pattern, get_stats and /api/patterns/sync latency and
+memory, and drives /predict end-to-end on the fake LLM backend at several
+concurrency levels. Every run happens in a fresh process against a temporary
+data directory; results are written as JSON and can be compared to a baseline.
+
+    python benchmark.py store --sizes 1000,100000 --backends json,sqlite
+    python benchmark.py predict --concurrency 1,8,32 --requests 400
+    python benchmark.py all --out results.json --compare baseline.json
+
+Needs httpx (pip install -r requirements-dev.txt) to call the app in-process.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Iterator, List, Optional
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+# -----------------------------
+# SYNTHETIC DATA
+# -----------------------------
+
+# (intent, question stems, options) in the shapes real application forms use
+QUESTION_SHAPES = [
+    ("workAuth.sponsorship", ["will you now or in the future require sponsorship",
+                              "do you require visa sponsorship", "will you need an employment visa"], ["Yes", "No"]),
+    ("workAuth.usAuthorized", ["are you legally authorized to work in the united states",
+                               "are you eligible to work in the us"], ["Yes", "No"]),
+    ("eeo.gender", ["what is your gender", "gender identity", "please select your gender"],
+     ["Male", "Female", "Prefer not to say"]),
+    ("eeo.race", ["please select your race or ethnicity", "race / ethnicity"],
+     ["Asian", "White", "Black or African American", "Decline to answer"]),
+    ("eeo.veteran", ["are you a protected veteran", "veteran status"],
+     ["I am not a veteran", "I am a protected veteran", "Decline to answer"]),
+    ("eeo.disability", ["do you have a disability", "disability status"],
+     ["Yes", "No", "I do not want to answer"]),
+    ("location.country", ["country of residence", "which country do you live in"], []),
+    ("location.state", ["state of residence", "which state are you located in"], []),
+    ("workAuth.driverLicense", ["do you have a valid driver's license"], ["Yes", "No"]),
+    ("application.previouslyApplied", ["have you previously applied to", "have you worked for"], ["Yes", "No"]),
+    ("application.hasRelatives", ["do you have relatives employed at", "are you related to anyone at"], ["Yes", "No"]),
+]
+
+COMPANIES = [
+    "acme", "globex", "initech", "umbrella", "hooli", "stark industries", "wayne enterprises",
+    "wonka", "cyberdyne", "soylent", "tyrell", "aperture", "massive dynamic", "vandelay",
+]
+QUALIFIERS = ["", "for this role", "for this position", "at this time", "currently", "(required)"]
+
+
+def synthetic_question(n: int) -> tuple:
+    """(intent, question, options) for pattern number n; unique for every n"""
+    intent, stems, options = QUESTION_SHAPES[n % len(QUESTION_SHAPES)]
+    stem = stems[(n // len(QUESTION_SHAPES)) % len(stems)]
+    company = COMPANIES[(n // 7) % len(COMPANIES)]
+    qualifier = QUALIFIERS[(n // 11) % len(QUALIFIERS)]
+    # The form id keeps questions unique, like per-employer custom questions
+    question = f"{stem} {company} {qualifier} form {n}".replace("  ", " ").strip()
+    return intent, question, options
+
+
+def synthetic_pattern(n: int) -> dict:
+    intent, question, options = synthetic_question(n)
+    answer = options[n % len(options)] if options else "United States"
+    now = datetime.now().isoformat()
+    return {
+        "questionPattern": question,
+        "intent": intent,
+        "canonicalKey": None,
+        "fieldType": "radio" if options else "text",
+        "confidence": 0.9,
+        "source": "AI",
+        "answerMappings": [{"canonicalValue": answer, "variants": [answer], "contextOptions": options}],
+        "usageCount": 1 + n % 17,
+        "createdAt": now,
+        "lastUsed": now,
+        "id": f"pattern_bench_{n}",
+    }
+
+
+def write_snapshot(path: str, size: int):
+    """patterns.json with `size` patterns, streamed so 1M patterns fit in memory"""
+    with open(path, "w") as f:
+        f.write('{"patterns": [')
+        for n in range(size):
+            if n:
+                f.write(",")
+            f.write(json.dumps(synthetic_pattern(n)))
+        f.write("]}")
+
+
+def query_mix(size: int, count: int, rng: random.Random) -> List[tuple]:
+    """(kind, question): stored questions, paraphrased ones (word dropped) and unseen ones"""
+    queries = []
+    for i in range(count):
+        n = rng.randrange(size)
+        _, question, _ = synthetic_question(n)
+        kind = ("exact", "fuzzy", "miss")[i % 3]
+        if kind == "fuzzy":
+            words = question.split()
+            del words[rng.randrange(len(words))]
+            question = " ".join(words)
+        elif kind == "miss":
+            question = f"describe a time you handled {rng.choice(COMPANIES)} pressure {rng.randrange(10 ** 9)}"
+        queries.append((kind, question))
+    return queries
+
+
+# -----------------------------
+# MEASUREMENT
+# -----------------------------
+
+def rss_mb() -> float:
+    """Current resident set size (Linux /proc), falling back to the peak"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+def summarize(samples: List[float], elapsed: Optional[float] = None) -> dict:
+    """Latency percentiles in milliseconds"""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def pct(p: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000, 3)
+
+    total = elapsed if elapsed is not None else sum(samples)
+    return {
+        "count": len(samples),
+        "meanMs": round(sum(samples) / len(samples) * 1000, 3),
+        "p50Ms": pct(0.50),
+        "p95Ms": pct(0.95),
+        "p99Ms": pct(0.99),
+        "maxMs": round(ordered[-1] * 1000, 3),
+        "opsPerSec": round(len(samples) / total, 1) if total > 0 else None,
+    }
+
+
+def timed(fn: Callable, items) -> dict:
+    samples = []
+    for item in items:
+        start = time.perf_counter()
+        fn(item)
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def _configure(data_dir: str, backend: str):
+    """Point every data file at data_dir; must run before the service modules are imported"""
+    from config import config
+
+    config.DATA_DIR = data_dir
+    config.PATTERNS_FILE = os.path.join(data_dir, "patterns.json")
+    config.PATTERNS_JOURNAL_FILE = os.path.join(data_dir, "patterns.journal.jsonl")
+    config.PATTERNS_LOCK_FILE = os.path.join(data_dir, "patterns.lock")
+    config.PATTERNS_DB_FILE = os.path.join(data_dir, "patterns.db")
+    config.PATTERNS_VECTORS_FILE = os.path.join(data_dir, "patterns.vectors.npz")
+    config.USERS_DIR = os.path.join(data_dir, "users")
+    config.PATTERNS_BACKEND = backend
+    return config
+
+
+def _http_client(app):
+    try:
+        import httpx
+    except ImportError:
+        sys.exit("benchmark.py needs httpx: pip install -r requirements-dev.txt")
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+
+
+# -----------------------------
+# PATTERN STORE
+# -----------------------------
+
+def run_store(size: int, backend: str, ops: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory(prefix="ai-service-bench-") as data_dir:
+        _configure(data_dir, backend)
+        generate_start = time.perf_counter()
+        write_snapshot(os.path.join(data_dir, "patterns.json"), size)
+        generate_seconds = time.perf_counter() - generate_start
+        rss_before = rss_mb()
+
+        from models import Pattern
+        from pattern_store import pattern_store
+        from vector_index import vector_index
+        from intent_classifier import intent_classifier
+        import pattern_service
+
+        # Startup steps in the order of app.lifespan
+        startup = {}
+        for name, step in (("patternStore", pattern_store.start),
+                           ("vectorIndex", vector_index.start),
+                           ("intentClassifier", intent_classifier.start)):
+            start = time.perf_counter()
+            step()
+            startup[name] = round(time.perf_counter() - start, 3)
+        rss_loaded = rss_mb()
+
+        queries = query_mix(size, ops, rng)
+        search = {
+            kind: timed(pattern_service.search_pattern, [q for k, q in queries if k == kind])
+            for kind in ("exact", "fuzzy", "miss")
+        }
+        hits = {
+            kind: sum(pattern_service.search_pattern(q) is not None for k, q in queries if k == kind)
+            for kind in ("exact", "fuzzy")
+        }
+
+        def _pattern(n: int) -> Pattern:
+            return Pattern(**{k: v for k, v in synthetic_pattern(n).items() if k != "id"})
+
+        inserts = [_pattern(size + i) for i in range(ops)]
+        updates = [_pattern(rng.randrange(size)) for _ in range(ops)]
+        save = {
+            "insert": timed(pattern_service.save_pattern, inserts),
+            "update": timed(pattern_service.save_pattern, updates),
+        }
+        stats = timed(lambda _: pattern_service.get_stats(), range(max(1, ops // 10)))
+
+        sync = asyncio.run(_bench_sync(max(1, ops // 50)))
+
+        start = time.perf_counter()
+        pattern_store.close()
+        vector_index.close()
+        shutdown_seconds = time.perf_counter() - start
+
+        return {
+            "benchmark": "store",
+            "backend": backend,
+            "size": size,
+            "generateSeconds": round(generate_seconds, 3),
+            "startupSeconds": startup,
+            "memoryMb": {
+                "beforeLoad": round(rss_before, 1),
+                "afterLoad": round(rss_loaded, 1),
+                "patterns": round(rss_loaded - rss_before, 1),
+                "peak": round(peak_rss_mb(), 1),
+            },
+            "searchPattern": search,
+            "searchHitRate": {kind: round(hits[kind] / max(1, search[kind]["count"]), 3) for kind in hits},
+            "savePattern": save,
+            "getStats": stats,
+            "sync": sync,
+            "shutdownSeconds": round(shutdown_seconds, 3),
+        }
+
+
+async def _bench_sync(repeat: int) -> dict:
+    from app import app
+
+    async def _measure(path: str, headers: Optional[dict] = None, n: int = repeat) -> dict:
+        samples, size, status = [], 0, None
+        for _ in range(n):
+            start = time.perf_counter()
+            response = await client.get(path, headers=headers or {})
+            body = await response.aread()
+            samples.append(time.perf_counter() - start)
+            size, status = len(body), response.status_code
+        return dict(summarize(samples), bytes=size, status=status)
+
+    async with _http_client(app) as client:
+        first = await client.get("/api/patterns/sync?since=0&fields=id")
+        etag = first.headers.get("etag")
+        cursor = int(first.json().get("cursor", 0))
+        return {
+            # First request builds and compresses the body, later ones hit the response cache
+            "fullJsonCold": await _measure("/api/patterns/sync", n=1),
+            "fullJson": await _measure("/api/patterns/sync"),
+            "fullJsonGzip": await _measure("/api/patterns/sync", {"Accept-Encoding": "gzip"}),
+            "fullNdjson": await _measure("/api/patterns/sync?format=ndjson"),
+            "incremental": await _measure(f"/api/patterns/sync?since={max(0, cursor - 100)}"),
+            "notModified": await _measure("/api/patterns/sync?since=0&fields=id", {"If-None-Match": etag or ""}),
+        }
+
+
+# -----------------------------
+# /predict END TO END
+# -----------------------------
+
+PROFILE = {
+    "personal": {
+        "firstName": "Jordan", "lastName": "Lee", "email": "jordan.lee@example.com",
+        "phone": "+1 415 555 0100", "city": "Austin", "state": "Texas", "country": "United States",
+    },
+    "workAuthorization": {"authorizedUS": True, "needsSponsorship": False},
+    "experience": {"summary": "Backend engineer, 6 years of Python and AWS", "years": 6},
+}
+
+
+def predict_requests(count: int, repeat_ratio: float, rng: random.Random) -> List[dict]:
+    """/predict bodies: profile lookups, option picks and free text; repeat_ratio of them asked before"""
+    bodies: List[dict] = []
+    for i in range(count):
+        if bodies and rng.random() < repeat_ratio:
+            bodies.append(rng.choice(bodies))
+            continue
+        shape = i % 4
+        if shape == 0:
+            question, options, field_type = rng.choice(["First name", "Email address", "Phone", "City"]), None, "text"
+        elif shape == 1:
+            _, question, options = synthetic_question(rng.randrange(10 ** 6))
+            options, field_type = options or ["Yes", "No"], "radio"
+        elif shape == 2:
+            question = f"Why are you interested in working at {rng.choice(COMPANIES)}? ({i})"
+            options, field_type = None, "textarea"
+        else:
+            question = f"How many years of experience do you have with tool {i}?"
+            options, field_type = None, "text"
+        bodies.append({
+            "question": question, "options": options, "fieldType": field_type,
+            "userProfile": PROFILE, "required": i % 3 == 0,
+        })
+    return bodies
+
+
+def run_predict(concurrency: int, requests: int, latency: str, repeat_ratio: float,
+                patterns: int, seed: int) -> dict:
+    os.environ["LLM_BACKEND"] = "fake"
+    os.environ["FAKE_LLM_LATENCY"] = latency
+    os.environ["FAKE_LLM_SEED"] = str(seed)
+    with tempfile.TemporaryDirectory(prefix="ai-service-bench-") as data_dir:
+        _configure(data_dir, "json")
+        write_snapshot(os.path.join(data_dir, "patterns.json"), patterns)
+        return asyncio.run(_drive_predict(concurrency, requests, latency, repeat_ratio, patterns, seed))
+
+
+async def _drive_predict(concurrency: int, requests: int, latency: str, repeat_ratio: float,
+                         patterns: int, seed: int) -> dict:
+    from app import app
+
+    bodies = predict_requests(requests, repeat_ratio, random.Random(seed))
+    queue: asyncio.Queue = asyncio.Queue()
+    for body in bodies:
+        queue.put_nowait(body)
+    samples: List[float] = []
+    required_samples: List[float] = []
+    errors = 0
+
+    async with app.router.lifespan_context(app), _http_client(app) as client:
+        async def _worker():
+            nonlocal errors
+            while not queue.empty():
+                body = queue.get_nowait()
+                start = time.perf_counter()
+                response = await client.post("/predict", json=body)
+                elapsed = time.perf_counter() - start
+                if response.status_code != 200 or not response.json().get("answer"):
+                    errors += 1
+                samples.append(elapsed)
+                if body["required"]:
+                    required_samples.append(elapsed)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(_worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        health = (await client.get("/health")).json()
+
+    return {
+        "benchmark": "predict",
+        "concurrency": concurrency,
+        "requests": requests,
+        "fakeLatency": latency,
+        "repeatRatio": repeat_ratio,
+        "storedPatterns": patterns,
+        "latency": summarize(samples, elapsed),
+        "requiredLatency": summarize(required_samples),
+        "errors": errors,
+        "llmCalls": health["llm"].get("calls"),
+        "predictionCache": health["predictionCache"],
+        "profileResolver": health["profileResolver"]["callsAvoided"],
+        "concurrencyLimit": health["concurrency"]["limit"],
+        "peakMemoryMb": round(peak_rss_mb(), 1),
+    }
+
+
+# -----------------------------
+# RUNNER
+# -----------------------------
+
+def _child(kind: str, params: dict) -> dict:
+    """Run one benchmark in a fresh interpreter (clean module state and peak RSS)"""
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as out:
+        path = out.name
+    try:
+        subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "_child", kind, json.dumps(params), path],
+            cwd=HERE, check=True,
+        )
+        with open(path) as f:
+            return json.load(f)
+    finally:
+        os.remove(path)
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def _result_key(result: dict) -> str:
+    if result["benchmark"] == "store":
+        return f"store/{result['backend']}/{result['size']}"
+    return f"predict/c{result['concurrency']}"
+
+
+def _p95s(result: dict) -> Iterator[tuple]:
+    """(metric name, p95 ms) pairs compared against a baseline"""
+    if result["benchmark"] == "store":
+        for kind, s in result["searchPattern"].items():
+            yield f"searchPattern.{kind}", s.get("p95Ms")
+        for kind, s in result["savePattern"].items():
+            yield f"savePattern.{kind}", s.get("p95Ms")
+        yield "getStats", result["getStats"].get("p95Ms")
+        for kind, s in result["sync"].items():
+            yield f"sync.{kind}", s.get("p95Ms")
+    else:
+        yield "predict", result["latency"].get("p95Ms")
+
+
+def compare(results: List[dict], baseline_path: str, tolerance: float) -> List[str]:
+    """Metrics whose p95 grew by more than `tolerance` (fraction) over the baseline run"""
+    with open(baseline_path) as f:
+        baseline = {_result_key(r): dict(_p95s(r)) for r in json.load(f)["results"]}
+    regressions = []
+    for result in results:
+        before = baseline.get(_result_key(result), {})
+        for metric, p95 in _p95s(result):
+            old = before.get(metric)
+            # Sub-millisecond timings are too noisy to gate on
+            if p95 is not None and old and max(p95, old) >= 1.0 and p95 > old * (1 + tolerance):
+                regressions.append(f"{_result_key(result)} {metric}: p95 {old}ms → {p95}ms")
+    return regressions
+
+
+def _print_summary(result: dict):
+    key = _result_key(result)
+    if result["benchmark"] == "store":
+        search = result["searchPattern"]
+        print(
+            f"{key:<24} load {result['startupSeconds']['patternStore']:>7}s  "
+            f"mem {result['memoryMb']['patterns']:>8}MB  "
+            f"search p95 exact/fuzzy/miss {search['exact'].get('p95Ms')}/{search['fuzzy'].get('p95Ms')}/"
+            f"{search['miss'].get('p95Ms')}ms  save p95 {result['savePattern']['insert'].get('p95Ms')}ms  "
+            f"sync p95 {result['sync']['fullJson'].get('p95Ms')}ms",
+            file=sys.stderr,
+        )
+    else:
+        latency = result["latency"]
+        print(
+            f"{key:<24} {latency.get('opsPerSec')} req/s  p50 {latency.get('p50Ms')}ms  "
+            f"p95 {latency.get('p95Ms')}ms  required p95 {result['requiredLatency'].get('p95Ms')}ms  "
+            f"LLM calls {result['llmCalls']}  errors {result['errors']}",
+            file=sys.stderr,
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "_child":
+        kind, params, out_path = argv[1], json.loads(argv[2]), argv[3]
+        result = run_store(**params) if kind == "store" else run_predict(**params)
+        with open(out_path, "w") as f:
+            json.dump(result, f)
+        return 0
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("suite", choices=["store", "predict", "all"])
+    parser.add_argument("--sizes", default="1000,100000", help="pattern store sizes, e.g. 1000,100000,1000000")
+    parser.add_argument("--backends", default="json", help="pattern store backends: json,sqlite")
+    parser.add_argument("--ops", type=int, default=600, help="searches / saves per store benchmark")
+    parser.add_argument("--concurrency", default="1,8,32", help="concurrent /predict clients")
+    parser.add_argument("--requests", type=int, default=400, help="/predict requests per concurrency level")
+    parser.add_argument("--latency", default="lognormal:0.3,0.4", help="fake LLM latency distribution")
+    parser.add_argument("--repeat-ratio", type=float, default=0.2, help="share of repeated /predict questions")
+    parser.add_argument("--patterns", type=int, default=1000, help="stored patterns during /predict runs")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", help="write results JSON here (default: stdout)")
+    parser.add_argument("--compare", help="baseline results JSON; exit 1 on p95 regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p95 growth vs the baseline")
+    args = parser.parse_args(argv)
+
+    results = []
+    if args.suite in ("store", "all"):
+        for backend in args.backends.split(","):
+            for size in (int(s) for s in args.sizes.split(",")):
+                result = _child("store", {"size": size, "backend": backend.strip(), "ops": args.ops, "seed": args.seed})
+                _print_summary(result)
+                results.append(result)
+    if args.suite in ("predict", "all"):
+        for concurrency in (int(c) for c in args.concurrency.split(",")):
+            result = _child("predict", {
+                "concurrency": concurrency, "requests": args.requests, "latency": args.latency,
+                "repeat_ratio": args.repeat_ratio, "patterns": args.patterns, "seed": args.seed,
+            })
+            _print_summary(result)
+            results.append(result)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
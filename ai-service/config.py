@@ -18,6 +18,46 @@ class Config:
     AWS_SECRET_ACCESS_KEY = os.environ.get("AWS_SECRET_ACCESS_KEY")
     BEDROCK_MODEL_ID = os.environ.get("BEDROCK_MODEL_ID", "us.amazon.nova-lite-v1:0")
     
+    # Bedrock Client (one long-lived client, shared by all inference threads)
+    BEDROCK_MAX_POOL_CONNECTIONS = int(os.environ.get("BEDROCK_MAX_POOL_CONNECTIONS", "32"))
+    BEDROCK_CONNECT_TIMEOUT = float(os.environ.get("BEDROCK_CONNECT_TIMEOUT", "3"))
+    BEDROCK_READ_TIMEOUT = float(os.environ.get("BEDROCK_READ_TIMEOUT", "30"))
+    # botocore's own retries; throttling is retried by bedrock_guard within the deadline instead
+    BEDROCK_MAX_ATTEMPTS = int(os.environ.get("BEDROCK_MAX_ATTEMPTS", "1"))
+    
+    # LLM backend: "bedrock", or "fake" (in-process, for load tests / CI without AWS)
+    LLM_BACKEND = os.environ.get("LLM_BACKEND", "bedrock")
+    # Fake backend: latency per call ("fixed:0.4", "uniform:0.2,1.5", "normal:0.8,0.2", "lognormal:0.8,0.5")
+    FAKE_LLM_LATENCY = os.environ.get("FAKE_LLM_LATENCY", "lognormal:0.8,0.4")
+    FAKE_LLM_THROTTLE_RATE = float(os.environ.get("FAKE_LLM_THROTTLE_RATE", "0"))
+    FAKE_LLM_SEED = int(os.environ.get("FAKE_LLM_SEED", "0"))
+    # JSON list of {"pattern": regex, "answer", "confidence", "intent"} answers
+    FAKE_LLM_RESPONSES_FILE = os.environ.get("FAKE_LLM_RESPONSES_FILE", "")
+    # Replies recorded with LLM_RECORD_FILE (JSON lines), replayed by prompt
+    FAKE_LLM_REPLAY_FILE = os.environ.get("FAKE_LLM_REPLAY_FILE", "")
+    LLM_RECORD_FILE = os.environ.get("LLM_RECORD_FILE", "")
+    
+    # Bedrock Guard (deadline per call, throttling backoff, hedging, circuit breaker)
+    BEDROCK_DEADLINE_SECONDS = float(os.environ.get("BEDROCK_DEADLINE_SECONDS", "20"))
+    BEDROCK_BATCH_DEADLINE_SECONDS = float(os.environ.get("BEDROCK_BATCH_DEADLINE_SECONDS", "45"))
+    # Streams: whole iteration, and longest gap between two chunks
+    BEDROCK_STREAM_DEADLINE_SECONDS = float(os.environ.get("BEDROCK_STREAM_DEADLINE_SECONDS", "45"))
+    BEDROCK_STREAM_CHUNK_TIMEOUT = float(os.environ.get("BEDROCK_STREAM_CHUNK_TIMEOUT", "10"))
+    # Upper bound for the botocore read timeout (no guarded call waits longer)
+    BEDROCK_MAX_DEADLINE_SECONDS = max(
+        BEDROCK_DEADLINE_SECONDS, BEDROCK_BATCH_DEADLINE_SECONDS, BEDROCK_STREAM_CHUNK_TIMEOUT
+    )
+    BEDROCK_THROTTLE_RETRIES = int(os.environ.get("BEDROCK_THROTTLE_RETRIES", "4"))
+    BEDROCK_BACKOFF_BASE = float(os.environ.get("BEDROCK_BACKOFF_BASE", "0.25"))
+    BEDROCK_BACKOFF_MAX = float(os.environ.get("BEDROCK_BACKOFF_MAX", "8"))
+    # Second request once the first is slower than the recent p95 (costs extra tokens)
+    BEDROCK_HEDGING = os.environ.get("BEDROCK_HEDGING", "false").lower() in ("1", "true", "yes")
+    BEDROCK_HEDGE_MIN_DELAY = float(os.environ.get("BEDROCK_HEDGE_MIN_DELAY", "1.0"))
+    BEDROCK_HEDGE_MIN_SAMPLES = int(os.environ.get("BEDROCK_HEDGE_MIN_SAMPLES", "20"))
+    BEDROCK_LATENCY_WINDOW = int(os.environ.get("BEDROCK_LATENCY_WINDOW", "200"))
+    BREAKER_FAILURE_THRESHOLD = int(os.environ.get("BREAKER_FAILURE_THRESHOLD", "5"))
+    BREAKER_RESET_SECONDS = float(os.environ.get("BREAKER_RESET_SECONDS", "30"))
+    
     # Server Configuration
     PORT = int(os.environ.get("PORT", "8001"))
     HOST = os.environ.get("HOST", "0.0.0.0")
@@ -27,13 +67,79 @@ class Config:
     PATTERNS_FILE = os.path.join(DATA_DIR, 'patterns.json')
     USERS_DIR = os.path.join(DATA_DIR, 'users')
     
+    # Pattern Store backend: "json" (in-memory + journal) or "sqlite"
+    PATTERNS_BACKEND = os.environ.get("PATTERNS_BACKEND", "json")
+    PATTERNS_DB_FILE = os.environ.get("PATTERNS_DB_FILE", os.path.join(DATA_DIR, 'patterns.db'))
+    SQLITE_FTS_CANDIDATES = int(os.environ.get("SQLITE_FTS_CANDIDATES", "500"))
+    
+    # JSON Pattern Store (in-memory; changes appended to the journal in the background,
+    # journal compacted into PATTERNS_FILE past a size or age threshold)
+    PATTERNS_JOURNAL_FILE = os.path.join(DATA_DIR, 'patterns.journal.jsonl')
+    PATTERNS_FLUSH_INTERVAL = float(os.environ.get("PATTERNS_FLUSH_INTERVAL", "2.0"))
+    PATTERNS_COMPACT_BYTES = int(os.environ.get("PATTERNS_COMPACT_BYTES", str(4 * 1024 * 1024)))
+    PATTERNS_COMPACT_INTERVAL = float(os.environ.get("PATTERNS_COMPACT_INTERVAL", "600"))
+    # Enable when running several worker processes (uvicorn --workers N)
+    PATTERNS_MULTIPROCESS = os.environ.get("PATTERNS_MULTIPROCESS", "false").lower() in ("1", "true", "yes")
+    PATTERNS_LOCK_FILE = os.path.join(DATA_DIR, 'patterns.lock')
+    
     # Thresholds
     FUZZY_MATCH_THRESHOLD = float(os.environ.get("FUZZY_MATCH_THRESHOLD", "0.7"))
     PATTERN_MEMORY_CONFIDENCE = float(os.environ.get("PATTERN_MEMORY_CONFIDENCE", "0.95"))
     MIN_CONFIDENCE_THRESHOLD = float(os.environ.get("MIN_CONFIDENCE_THRESHOLD", "0.6"))
+    MAX_SEARCH_RESULTS = int(os.environ.get("MAX_SEARCH_RESULTS", "50"))
+    
+    # Semantic search (hashed n-gram embeddings) when word overlap finds nothing
+    SEMANTIC_SEARCH = os.environ.get("SEMANTIC_SEARCH", "true").lower() in ("1", "true", "yes")
+    SEMANTIC_MATCH_THRESHOLD = float(os.environ.get("SEMANTIC_MATCH_THRESHOLD", "0.4"))
+    EMBEDDING_DIM = int(os.environ.get("EMBEDDING_DIM", "256"))
+    PATTERNS_VECTORS_FILE = os.environ.get("PATTERNS_VECTORS_FILE", os.path.join(DATA_DIR, 'patterns.vectors.npz'))
     
     # Model Configuration
     MAX_NEW_TOKENS = int(os.environ.get("MAX_NEW_TOKENS", "1000"))
+    # Model routing: option picks / short inputs use a small model and budget,
+    # free text uses BEDROCK_MODEL_ID with MAX_NEW_TOKENS
+    MODEL_ROUTING = os.environ.get("MODEL_ROUTING", "true").lower() in ("1", "true", "yes")
+    ROUTE_SMALL_MODEL_ID = os.environ.get("ROUTE_SMALL_MODEL_ID", "us.amazon.nova-micro-v1:0")
+    ROUTE_CHOICE_MAX_TOKENS = int(os.environ.get("ROUTE_CHOICE_MAX_TOKENS", "200"))
+    ROUTE_SHORT_TEXT_MAX_TOKENS = int(os.environ.get("ROUTE_SHORT_TEXT_MAX_TOKENS", "300"))
+    # Answer name / email / phone / LinkedIn / location questions straight from the profile
+    PROFILE_RESOLVER = os.environ.get("PROFILE_RESOLVER", "true").lower() in ("1", "true", "yes")
+    # Optional JSON file {"personal.phone": ["contact.mobile", ...]} of extra profile keys per intent
+    PROFILE_ALIASES_FILE = os.environ.get("PROFILE_ALIASES_FILE", "")
+    # Local intent classifier (seed phrasings + stored patterns); below the threshold the LLM decides
+    INTENT_CLASSIFIER = os.environ.get("INTENT_CLASSIFIER", "true").lower() in ("1", "true", "yes")
+    INTENT_CLASSIFIER_THRESHOLD = float(os.environ.get("INTENT_CLASSIFIER_THRESHOLD", "0.55"))
+    # Required lead of the best intent over the runner-up
+    INTENT_CLASSIFIER_MARGIN = float(os.environ.get("INTENT_CLASSIFIER_MARGIN", "0.1"))
+    # Seed phrasings outweigh the patterns learned for the same intent by this factor
+    INTENT_CLASSIFIER_SEED_WEIGHT = float(os.environ.get("INTENT_CLASSIFIER_SEED_WEIGHT", "3.0"))
+    INTENT_CLASSIFIER_RETRAIN_SECONDS = float(os.environ.get("INTENT_CLASSIFIER_RETRAIN_SECONDS", "300"))
+    # Send only the profile fields relevant to the question's likely intent
+    PROFILE_PROJECTION = os.environ.get("PROFILE_PROJECTION", "true").lower() in ("1", "true", "yes")
+    
+    # Batch Prediction (one Bedrock call per chunk of questions)
+    BATCH_CHUNK_SIZE = int(os.environ.get("BATCH_CHUNK_SIZE", "8"))
+    BATCH_MAX_NEW_TOKENS = int(os.environ.get("BATCH_MAX_NEW_TOKENS", "4000"))
+    
+    # Concurrency (blocking Bedrock calls run on a dedicated thread pool)
+    PREDICTION_MAX_IN_FLIGHT = int(os.environ.get("PREDICTION_MAX_IN_FLIGHT", "16"))
+    PREDICTION_WORKERS = int(os.environ.get("PREDICTION_WORKERS", "16"))
+    # AIMD: the in-flight limit starts at PREDICTION_MAX_IN_FLIGHT, grows while Bedrock is
+    # healthy (up to AIMD_MAX_IN_FLIGHT) and halves on throttling or latency spikes
+    ADAPTIVE_CONCURRENCY = os.environ.get("ADAPTIVE_CONCURRENCY", "true").lower() in ("1", "true", "yes")
+    AIMD_MIN_IN_FLIGHT = int(os.environ.get("AIMD_MIN_IN_FLIGHT", "1"))
+    AIMD_MAX_IN_FLIGHT = int(os.environ.get("AIMD_MAX_IN_FLIGHT", "32"))
+    AIMD_LATENCY_SPIKE_FACTOR = float(os.environ.get("AIMD_LATENCY_SPIKE_FACTOR", "2.5"))
+    AIMD_DECREASE_INTERVAL = float(os.environ.get("AIMD_DECREASE_INTERVAL", "2.0"))
+    
+    # Prediction cache (answers per question + options + fieldType + profile; 0 disables)
+    PREDICTION_CACHE_SIZE = int(os.environ.get("PREDICTION_CACHE_SIZE", "10000"))
+    PREDICTION_CACHE_TTL = float(os.environ.get("PREDICTION_CACHE_TTL", "3600"))
+    
+    # Pattern sync / stats responses (serialized and compressed once per store revision)
+    RESPONSE_CACHE_ENTRIES = int(os.environ.get("RESPONSE_CACHE_ENTRIES", "64"))
+    # Patterns per chunk written by /api/patterns/sync?format=ndjson
+    SYNC_STREAM_BATCH_SIZE = int(os.environ.get("SYNC_STREAM_BATCH_SIZE", "200"))
     
     # Privacy: Shareable Intents
     SHAREABLE_INTENTS: List[str] = [
@@ -0,0 +1,83 @@
+"""
+Inference Pool - Runs blocking model calls off the event loop
+In-flight calls bounded by the adaptive limiter, with queue-depth reporting
+"""
+import asyncio
+import functools
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+
+from adaptive_limiter import PRIORITY_OPTIONAL, AdaptiveLimiter, bedrock_limiter
+from config import config
+
+
+class InferencePool:
+    """Dedicated thread pool + (adaptive) max-in-flight limit for blocking Bedrock calls"""
+
+    def __init__(self, limiter: AdaptiveLimiter, max_workers: int):
+        self.limiter = limiter
+        self._executor = ThreadPoolExecutor(
+            # Enough threads for the highest limit the limiter can reach
+            max_workers=max(1, max_workers, limiter.max_limit),
+            thread_name_prefix="inference",
+        )
+        self._queued = 0
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+
+    async def run(self, fn: Callable[..., Any], *args, priority: int = PRIORITY_OPTIONAL, **kwargs) -> Any:
+        """Run fn(*args, **kwargs) in the pool once a slot is free (lower priority value first)."""
+        loop = asyncio.get_running_loop()
+
+        self._queued += 1
+        try:
+            await self.limiter.acquire(priority)
+        finally:
+            self._queued -= 1
+
+        self._in_flight += 1
+        try:
+            future = self._executor.submit(functools.partial(fn, *args, **kwargs))
+        except BaseException:
+            self._in_flight -= 1
+            self.limiter.release()
+            raise
+        # The slot is held until the thread is done, not until the caller stops waiting:
+        # a cancelled request (client gone) keeps its Bedrock call running
+        future.add_done_callback(lambda done: self._call_finished(loop, done))
+        return await asyncio.wrap_future(future)
+
+    def _call_finished(self, loop: asyncio.AbstractEventLoop, future: Future):
+        try:
+            loop.call_soon_threadsafe(self._settle, future)
+        except RuntimeError:
+            # Event loop already closed (shutdown)
+            pass
+
+    def _settle(self, future: Future):
+        self._in_flight -= 1
+        if future.cancelled() or future.exception() is not None:
+            self._failed += 1
+        else:
+            self._completed += 1
+        self.limiter.release()
+
+    def stats(self) -> dict:
+        return {
+            "maxInFlight": self.limiter.limit,
+            "inFlight": self._in_flight,
+            "queued": self._queued,
+            "completed": self._completed,
+            "failed": self._failed,
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Global pool instance
+inference_pool = InferencePool(
+    limiter=bedrock_limiter,
+    max_workers=config.PREDICTION_WORKERS,
+)
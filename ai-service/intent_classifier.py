@@ -0,0 +1,269 @@
+"""
+Intent Classifier - Local nearest-centroid intent model over ALLOWED_INTENTS
+Hashed word / character n-gram TF-IDF vectors, one centroid per intent,
+trained from seed phrasings plus stored patterns. Classifying is one small
+NumPy gather + dot product, so intent is known before any Bedrock call.
+"""
+import logging
+import math
+import re
+import threading
+import time
+import zlib
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from config import config
+
+logger = logging.getLogger("ai-service")
+
+# Hash space; the centroid matrix is N_FEATURES x len(intents) float32 (~2.3 MB)
+N_FEATURES = 1 << 15
+
+
+# Canonical phrasings per intent, so the model works before any pattern is learned
+SEED_EXAMPLES: Dict[str, List[str]] = {
+    "personal.firstName": ["first name", "legal first name", "given name", "preferred first name"],
+    "personal.lastName": ["last name", "legal last name", "surname", "family name"],
+    "personal.email": ["email", "email address", "e-mail", "your email"],
+    "personal.phone": ["phone", "phone number", "mobile phone number", "contact number"],
+    "personal.linkedin": ["linkedin profile", "linkedin url", "link to your linkedin", "linkedin profile url"],
+    "personal.city": ["city", "current city", "city of residence", "which city do you live in"],
+    "personal.state": ["state", "state or province", "state of residence", "which state do you live in"],
+    "personal.country": ["country", "country of residence", "current country", "which country do you live in"],
+    "personal.desiredSalary": [
+        "desired salary", "what are your salary expectations", "expected compensation",
+        "what is your desired annual pay", "salary requirements",
+    ],
+    "personal.additionalInfo": [
+        "is there anything else you would like us to know", "additional information",
+        "anything else you want to share", "what else should we know about you",
+    ],
+    "experience.whyFit": [
+        "why are you a strong fit for this role", "why should we hire you",
+        "why do you want to work here", "why are you interested in this position",
+        "what makes you a good fit",
+    ],
+    "experience.summary": [
+        "describe your relevant experience", "how many years of experience do you have",
+        "tell us about yourself", "summarize your professional background",
+    ],
+    "workAuthorization.authorizedUS": [
+        "are you legally authorized to work in the united states",
+        "are you eligible to work in the us", "do you have the right to work in this country",
+        "work authorization status",
+    ],
+    "workAuthorization.needsSponsorship": [
+        "will you now or in the future require sponsorship for employment visa status",
+        "do you need visa sponsorship", "will you require sponsorship",
+        "do you require an h-1b visa to work",
+    ],
+    "eeo.gender": ["gender", "what is your gender", "gender identity", "sex"],
+    "eeo.race": [
+        "race", "ethnicity", "are you hispanic or latino", "please select your race or ethnicity",
+    ],
+    "eeo.veteran": [
+        "veteran status", "are you a protected veteran", "have you served in the military",
+        "protected veteran status",
+    ],
+    "eeo.disability": [
+        "disability status", "do you have a disability", "voluntary self-identification of disability",
+    ],
+}
+
+
+# Pattern-memory intent names (SHAREABLE_INTENTS) -> ALLOWED_INTENTS names
+INTENT_ALIASES = {
+    "workAuth.sponsorship": "workAuthorization.needsSponsorship",
+    "workAuth.usAuthorized": "workAuthorization.authorizedUS",
+    "location.country": "personal.country",
+    "location.state": "personal.state",
+    "eeo.hispanic": "eeo.race",
+}
+
+
+# Pattern.intentSource values the classifier learns from (None: uploaded or older patterns)
+TRAINABLE_INTENT_SOURCES = (None, "model", "user")
+
+
+def canonical_intent(intent: Optional[str]) -> str:
+    return INTENT_ALIASES.get(intent or "", intent or "")
+
+
+def _features(text: str) -> Counter:
+    """Hashed word unigrams, word bigrams and character 3-grams"""
+    words = re.findall(r"[a-z0-9]+", (text or "").lower())
+    grams = [f"w:{w}" for w in words]
+    grams += [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+    for w in words:
+        padded = f" {w} "
+        grams += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+    return Counter(zlib.crc32(g.encode()) % N_FEATURES for g in grams)
+
+
+class IntentClassifier:
+    """TF-IDF nearest-centroid classifier; retrained when the pattern store changes"""
+
+    def __init__(self):
+        self._train_lock = threading.Lock()
+        # (intents, idf, default idf, centroids (n_features x n_intents)), swapped as a whole
+        self._model: Optional[Tuple[List[str], Dict[int, float], float, np.ndarray]] = None
+        self._trained_revision: Optional[int] = None
+        self._trained_at = 0.0
+        self.classified = 0
+        self.confident = 0
+
+    @staticmethod
+    def _vector(feats: Counter, idf: Dict[int, float], default_idf: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Feature indexes and L2-normalized log-TF x IDF weights"""
+        idx = np.fromiter(feats.keys(), dtype=np.int64, count=len(feats))
+        weights = np.fromiter(
+            ((1 + math.log(tf)) * idf.get(f, default_idf) for f, tf in feats.items()),
+            dtype=np.float32, count=len(feats),
+        )
+        norm = float(np.linalg.norm(weights))
+        return idx, (weights / norm if norm else weights)
+
+    def _centroid_sums(self, docs: List[Tuple[Counter, str]], column: Dict[str, int],
+                       idf: Dict[int, float], default_idf: float) -> List[Dict[int, float]]:
+        sums: List[Dict[int, float]] = [dict() for _ in column]
+        for feats, intent in docs:
+            idx, weights = self._vector(feats, idf, default_idf)
+            target = sums[column[intent]]
+            for f, w in zip(idx.tolist(), weights.tolist()):
+                target[f] = target.get(f, 0.0) + w
+        return sums
+
+    def train(self, examples: Iterable[Tuple[str, str]], revision: Optional[int] = None,
+              learned: Iterable[Tuple[str, str]] = ()):
+        """
+        (question, intent) pairs: `examples` are trusted seed phrasings, `learned` come from
+        pattern memory. Per intent, the seed centroid gets INTENT_CLASSIFIER_SEED_WEIGHT times
+        the weight of the learned one, so mislabelled stored patterns cannot outvote the seeds.
+        Intents outside the allowed set are ignored.
+        """
+        from ai_service import ALLOWED_INTENTS
+
+        def _docs(pairs):
+            docs = [(_features(q), canonical_intent(intent)) for q, intent in pairs if q]
+            return [(f, intent) for f, intent in docs
+                    if f and intent in ALLOWED_INTENTS and intent != "unknown"]
+
+        seed_docs, learned_docs = _docs(examples), _docs(learned)
+        docs = seed_docs + learned_docs
+        if not docs:
+            return
+
+        df: Counter = Counter()
+        for feats, _ in docs:
+            df.update(feats.keys())
+        n = len(docs)
+        idf = {f: math.log((1 + n) / (1 + c)) + 1 for f, c in df.items()}
+        default_idf = math.log(1 + n) + 1
+        intents = sorted({intent for _, intent in docs})
+        column = {intent: i for i, intent in enumerate(intents)}
+
+        # Sparse sums per intent first, then one dense (features x intents) matrix
+        centroids = np.zeros((N_FEATURES, len(intents)), dtype=np.float32)
+        for sums, weight in ((self._centroid_sums(seed_docs, column, idf, default_idf),
+                              config.INTENT_CLASSIFIER_SEED_WEIGHT),
+                             (self._centroid_sums(learned_docs, column, idf, default_idf), 1.0)):
+            for j, target in enumerate(sums):
+                if target:
+                    rows = np.fromiter(target.keys(), dtype=np.int64, count=len(target))
+                    values = np.fromiter(target.values(), dtype=np.float32, count=len(target))
+                    centroids[rows, j] += weight * values / np.linalg.norm(values)
+        norms = np.linalg.norm(centroids, axis=0)
+        centroids /= np.where(norms > 0, norms, 1.0)
+
+        self._model = (intents, idf, default_idf, centroids)
+        self._trained_revision, self._trained_at = revision, time.monotonic()
+        logger.info(
+            f"🏷️ Intent classifier trained on {len(seed_docs)} seed + {len(learned_docs)} learned examples, "
+            f"{len(intents)} intents"
+        )
+
+    def train_from_store(self):
+        from pattern_store import pattern_store
+
+        revision = pattern_store.revision()
+        examples = [(q, intent) for intent, qs in SEED_EXAMPLES.items() for q in qs]
+        # Only intents chosen by the model or a user; never the classifier's (or keyword rules') own guesses
+        learned = [
+            ((p.get("questionPattern") or "").replace("*", " "), p.get("intent"))
+            for p in pattern_store.iter_all()
+            if p.get("intentSource") in TRAINABLE_INTENT_SOURCES
+        ]
+        self.train(examples, revision, learned)
+
+    def start(self):
+        """Train on app startup (otherwise on first use)"""
+        if config.INTENT_CLASSIFIER:
+            with self._train_lock:
+                if self._model is None:
+                    self.train_from_store()
+
+    def _maybe_retrain(self):
+        from pattern_store import pattern_store
+
+        if self._model is None:
+            self.start()
+            return
+        stale = time.monotonic() - self._trained_at >= config.INTENT_CLASSIFIER_RETRAIN_SECONDS
+        if stale and pattern_store.revision() != self._trained_revision:
+            # Later callers keep using the current model meanwhile
+            self._trained_at = time.monotonic()
+            threading.Thread(target=self.train_from_store, name="intent-train", daemon=True).start()
+
+    def classify(self, question: str) -> Tuple[str, float, float]:
+        """
+        (intent, cosine similarity to its centroid, lead over the runner-up);
+        ("unknown", 0.0, 0.0) if nothing matches
+        """
+        self._maybe_retrain()
+        feats = _features(question)
+        model = self._model
+        if model is None or not feats:
+            return "unknown", 0.0, 0.0
+
+        intents, idf, default_idf, centroids = model
+        idx, weights = self._vector(feats, idf, default_idf)
+        scores = weights @ centroids[idx]
+        order = np.argsort(-scores)
+        best = int(order[0])
+        score = float(scores[best])
+        margin = score - float(scores[order[1]]) if len(order) > 1 else score
+        self.classified += 1
+        if self._is_confident(score, margin):
+            self.confident += 1
+        return (intents[best], score, margin) if score > 0 else ("unknown", 0.0, 0.0)
+
+    @staticmethod
+    def _is_confident(score: float, margin: float) -> bool:
+        return score >= config.INTENT_CLASSIFIER_THRESHOLD and margin >= config.INTENT_CLASSIFIER_MARGIN
+
+    def confident_intent(self, question: str) -> Optional[str]:
+        """
+        Intent if it clears INTENT_CLASSIFIER_THRESHOLD and beats the runner-up by
+        INTENT_CLASSIFIER_MARGIN, else None (ask the LLM)
+        """
+        if not config.INTENT_CLASSIFIER:
+            return None
+        intent, score, margin = self.classify(question)
+        return intent if self._is_confident(score, margin) else None
+
+    def stats(self) -> dict:
+        return {
+            "enabled": config.INTENT_CLASSIFIER,
+            "intents": len(self._model[0]) if self._model else 0,
+            "threshold": config.INTENT_CLASSIFIER_THRESHOLD,
+            "margin": config.INTENT_CLASSIFIER_MARGIN,
+            "classified": self.classified,
+            "confident": self.confident,
+        }
+
+
+# Global classifier instance
+intent_classifier = IntentClassifier()
@@ -0,0 +1,375 @@
+"""
+LLM Backend - Pluggable text generation behind the prediction path
+LLM_BACKEND selects Bedrock (default) or an in-process fake with configurable
+latency, canned answers and record/replay, so /predict can be load-tested
+without AWS. Deadlines, retries and the breaker (bedrock_guard) wrap any backend.
+"""
+import hashlib
+import json
+import logging
+import math
+import random
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterator, List, Optional
+
+from botocore.exceptions import ClientError
+
+from bedrock_client import bedrock_manager
+from config import config
+
+logger = logging.getLogger("ai-service")
+
+
+def prompt_key(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+class LLMBackend(ABC):
+    """
+    Text generation used by ai_service. Both methods block and are called from
+    inference threads, wrapped by bedrock_guard.
+    """
+
+    name = "base"
+    default_model = ""
+
+    def is_configured(self) -> bool:
+        return True
+
+    @abstractmethod
+    def generate(self, prompt: str, max_tokens: int, model_id: Optional[str] = None) -> str:
+        """The whole reply text"""
+
+    @abstractmethod
+    def generate_stream(self, prompt: str, max_tokens: int, model_id: Optional[str] = None) -> Iterator[str]:
+        """Starts the request before returning; the iterator yields text deltas"""
+
+    def start(self):
+        pass
+
+    def close(self):
+        pass
+
+    def stats(self) -> dict:
+        return {"backend": self.name, "defaultModel": self.default_model}
+
+
+# -----------------------------
+# AWS BEDROCK
+# -----------------------------
+
+class BedrockBackend(LLMBackend):
+    """Amazon Nova (or any messages-API model) through the shared bedrock-runtime client"""
+
+    name = "bedrock"
+
+    def __init__(self):
+        self.default_model = bedrock_manager.model_id
+
+    def is_configured(self) -> bool:
+        return bedrock_manager.has_credentials()
+
+    @staticmethod
+    def _request_body(prompt: str, max_tokens: int) -> str:
+        return json.dumps(
+            {
+                "inferenceConfig": {"max_new_tokens": max_tokens},
+                "messages": [{"role": "user", "content": [{"text": prompt}]}],
+            }
+        )
+
+    def generate(self, prompt: str, max_tokens: int, model_id: Optional[str] = None) -> str:
+        response = bedrock_manager.get_client().invoke_model(
+            body=self._request_body(prompt, max_tokens),
+            modelId=model_id or self.default_model,
+            accept="application/json",
+            contentType="application/json",
+        )
+        response_body = json.loads(response["body"].read())
+        return response_body["output"]["message"]["content"][0]["text"]
+
+    def generate_stream(self, prompt: str, max_tokens: int, model_id: Optional[str] = None) -> Iterator[str]:
+        response = bedrock_manager.get_client().invoke_model_with_response_stream(
+            body=self._request_body(prompt, max_tokens),
+            modelId=model_id or self.default_model,
+            accept="application/json",
+            contentType="application/json",
+        )
+        return self._deltas(response)
+
+    @staticmethod
+    def _deltas(response) -> Iterator[str]:
+        for event in response["body"]:
+            chunk = event.get("chunk")
+            if not chunk:
+                continue
+            data = json.loads(chunk["bytes"])
+            text = data.get("contentBlockDelta", {}).get("delta", {}).get("text")
+            if text:
+                yield text
+
+    def start(self):
+        bedrock_manager.start()
+
+    def close(self):
+        bedrock_manager.close()
+
+
+# -----------------------------
+# FAKE (load tests, CI, offline development)
+# -----------------------------
+
+def latency_sampler(spec: str, rng: random.Random) -> Callable[[], float]:
+    """
+    Seconds per call from a spec: "fixed:0.4", "uniform:0.2,1.5",
+    "normal:0.8,0.2" (mean, stddev) or "lognormal:0.8,0.5" (median, sigma)
+    """
+    kind, _, params = (spec or "fixed:0").partition(":")
+    values = [float(v) for v in params.split(",") if v.strip()] or [0.0]
+    kind = kind.strip().lower()
+    if kind == "uniform":
+        low, high = values[0], values[-1]
+        return lambda: rng.uniform(low, high)
+    if kind == "normal":
+        mean, std = values[0], values[1] if len(values) > 1 else 0.0
+        return lambda: max(0.0, rng.gauss(mean, std))
+    if kind == "lognormal":
+        median, sigma = values[0], values[1] if len(values) > 1 else 0.5
+        mu = math.log(median) if median > 0 else 0.0
+        return lambda: rng.lognormvariate(mu, sigma) if median > 0 else 0.0
+    if kind != "fixed":
+        raise ValueError(f"Unknown latency distribution: {spec}")
+    return lambda: values[0]
+
+
+_OPTION_LINE = re.compile(r"^- (.+)$")
+_BATCH_QUESTION = re.compile(r"^\[(\d+)\] (.*)$")
+
+
+class FakeBackend(LLMBackend):
+    """
+    Replies in the model's JSON format after a sampled delay. Answers come from,
+    in order: a recorded reply for the same prompt (FAKE_LLM_REPLAY_FILE), the
+    first canned answer whose pattern matches the question (FAKE_LLM_RESPONSES_FILE),
+    else the first option or a stock sentence. FAKE_LLM_THROTTLE_RATE of calls
+    fail with ThrottlingException.
+    """
+
+    name = "fake"
+    default_model = "fake"
+
+    def __init__(self):
+        self._rng = random.Random(config.FAKE_LLM_SEED)
+        self._rng_lock = threading.Lock()
+        self._latency = latency_sampler(config.FAKE_LLM_LATENCY, self._rng)
+        self._replies = self._load_replay(config.FAKE_LLM_REPLAY_FILE)
+        self._canned = self._load_canned(config.FAKE_LLM_RESPONSES_FILE)
+        self.calls = 0
+        self.replayed = 0
+        self.throttled = 0
+
+    @staticmethod
+    def _load_replay(path: str) -> Dict[str, str]:
+        replies: Dict[str, str] = {}
+        if not path:
+            return replies
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        replies[record["key"]] = record["reply"]
+        except Exception as e:
+            logger.warning(f"⚠ Could not load replay file {path}: {e}")
+        return replies
+
+    @staticmethod
+    def _load_canned(path: str) -> List[dict]:
+        """[{"pattern": "<regex on the question>", "answer": ..., "confidence": ..., "intent": ...}]"""
+        if not path:
+            return []
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                canned = json.load(f)
+            return [dict(entry, _regex=re.compile(entry["pattern"], re.IGNORECASE)) for entry in canned]
+        except Exception as e:
+            logger.warning(f"⚠ Could not load canned responses {path}: {e}")
+            return []
+
+    def _sample(self) -> float:
+        with self._rng_lock:
+            return self._latency()
+
+    def _maybe_throttle(self):
+        with self._rng_lock:
+            throttle = self._rng.random() < config.FAKE_LLM_THROTTLE_RATE
+        if throttle:
+            self.throttled += 1
+            raise ClientError(
+                {"Error": {"Code": "ThrottlingException", "Message": "Fake throttling"},
+                 "ResponseMetadata": {"HTTPStatusCode": 429}},
+                "InvokeModel",
+            )
+
+    # ---------- reply synthesis ----------
+
+    def _answer(self, question: str, options: List[str], intent: str) -> dict:
+        for entry in self._canned:
+            if entry["_regex"].search(question):
+                return {
+                    "answer": entry.get("answer", ""),
+                    "confidence": entry.get("confidence", 0.9),
+                    "reasoning": entry.get("reasoning", "Canned fake response"),
+                    "intent": entry.get("intent", intent),
+                }
+        return {
+            "answer": options[0] if options else "I bring relevant experience and would be glad to discuss it.",
+            "confidence": 0.85,
+            "reasoning": "Fake backend response",
+            "intent": intent,
+        }
+
+    @staticmethod
+    def _options_after(lines: List[str], start: int) -> List[str]:
+        """Options of the AVAILABLE OPTIONS block following lines[start - 1], if any"""
+        rest = [line for line in lines[start:start + 3] if line.strip()]
+        if not rest or not rest[0].startswith("AVAILABLE OPTIONS"):
+            return []
+        options = []
+        for line in lines[lines.index(rest[0], start) + 1:]:
+            match = _OPTION_LINE.match(line)
+            if not match:
+                break
+            options.append(match.group(1))
+        return options
+
+    def _reply_for(self, prompt: str) -> str:
+        from profile_projection import rule_intent
+
+        lines = prompt.splitlines()
+        if "QUESTIONS (ANSWER EVERY ONE" in prompt:
+            answers = []
+            for n, line in enumerate(lines):
+                match = _BATCH_QUESTION.match(line)
+                if match:
+                    question = match.group(2)
+                    entry = self._answer(question, self._options_after(lines, n + 1), rule_intent(question))
+                    answers.append(dict(entry, id=int(match.group(1))))
+            return json.dumps({"answers": answers})
+
+        n = lines.index("QUESTION:") + 1 if "QUESTION:" in lines else len(lines)
+        question = lines[n] if n < len(lines) else ""
+        return json.dumps(self._answer(question, self._options_after(lines, n + 1), rule_intent(question)))
+
+    def _reply(self, prompt: str) -> str:
+        self.calls += 1
+        self._maybe_throttle()
+        recorded = self._replies.get(prompt_key(prompt))
+        if recorded is not None:
+            self.replayed += 1
+            return recorded
+        return self._reply_for(prompt)
+
+    # ---------- LLMBackend ----------
+
+    def generate(self, prompt: str, max_tokens: int, model_id: Optional[str] = None) -> str:
+        delay = self._sample()
+        reply = self._reply(prompt)
+        time.sleep(delay)
+        return reply
+
+    def generate_stream(self, prompt: str, max_tokens: int, model_id: Optional[str] = None) -> Iterator[str]:
+        delay = self._sample()
+        reply = self._reply(prompt)
+        pieces = [reply[i:i + 8] for i in range(0, len(reply), 8)] or [""]
+        # A fifth of the latency before the first token, the rest spread over the reply
+        time.sleep(delay / 5)
+
+        def _deltas() -> Iterator[str]:
+            for piece in pieces:
+                time.sleep(delay * 4 / 5 / len(pieces))
+                yield piece
+
+        return _deltas()
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.name,
+            "defaultModel": self.default_model,
+            "latency": config.FAKE_LLM_LATENCY,
+            "calls": self.calls,
+            "replayed": self.replayed,
+            "throttled": self.throttled,
+        }
+
+
+# -----------------------------
+# RECORDING (capture replies for FakeBackend replay)
+# -----------------------------
+
+class RecordingBackend(LLMBackend):
+    """Passes calls to another backend and appends {"key", "reply"} lines to LLM_RECORD_FILE"""
+
+    def __init__(self, inner: LLMBackend, path: str):
+        self.inner = inner
+        self.path = path
+        self.name = inner.name
+        self.default_model = inner.default_model
+        self._lock = threading.Lock()
+
+    def _record(self, prompt: str, reply: str):
+        line = json.dumps({"key": prompt_key(prompt), "reply": reply}, ensure_ascii=False)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    def is_configured(self) -> bool:
+        return self.inner.is_configured()
+
+    def generate(self, prompt: str, max_tokens: int, model_id: Optional[str] = None) -> str:
+        reply = self.inner.generate(prompt, max_tokens, model_id)
+        self._record(prompt, reply)
+        return reply
+
+    def generate_stream(self, prompt: str, max_tokens: int, model_id: Optional[str] = None) -> Iterator[str]:
+        deltas = self.inner.generate_stream(prompt, max_tokens, model_id)
+
+        def _recorded() -> Iterator[str]:
+            parts = []
+            for delta in deltas:
+                parts.append(delta)
+                yield delta
+            self._record(prompt, "".join(parts))
+
+        return _recorded()
+
+    def start(self):
+        self.inner.start()
+
+    def close(self):
+        self.inner.close()
+
+    def stats(self) -> dict:
+        return dict(self.inner.stats(), recordingTo=self.path)
+
+
+BACKENDS = {
+    "bedrock": BedrockBackend,
+    "fake": FakeBackend,
+}
+
+
+def create_backend(name: str) -> LLMBackend:
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown LLM_BACKEND '{name}' (expected one of {', '.join(BACKENDS)})")
+    backend = BACKENDS[name]()
+    if config.LLM_RECORD_FILE:
+        backend = RecordingBackend(backend, config.LLM_RECORD_FILE)
+    logger.info(f"🔌 LLM backend: {backend.name}")
+    return backend
+
+
+# Global backend instance
+llm_backend = create_backend(config.LLM_BACKEND.lower())
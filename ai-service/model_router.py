@@ -0,0 +1,85 @@
+"""
+Model Router - Model id and output-token budget per question
+Option picks and short inputs go to a small model with a small budget;
+free-text answers keep the main model and the full budget
+"""
+import threading
+from collections import Counter
+from typing import Dict, List, NamedTuple, Optional
+
+from config import config
+from profile_projection import guess_intent
+
+
+class Route(NamedTuple):
+    name: str
+    model_id: str
+    max_new_tokens: int
+
+
+ROUTES: Dict[str, Route] = {
+    "choice": Route("choice", config.ROUTE_SMALL_MODEL_ID, config.ROUTE_CHOICE_MAX_TOKENS),
+    "short_text": Route("short_text", config.ROUTE_SMALL_MODEL_ID, config.ROUTE_SHORT_TEXT_MAX_TOKENS),
+    "long_text": Route("long_text", config.BEDROCK_MODEL_ID, config.MAX_NEW_TOKENS),
+}
+
+# AIRequest.fieldType / Action.type -> route (questions with options are always "choice")
+FIELD_TYPE_ROUTES = {
+    "radio": "choice",
+    "checkbox": "choice",
+    "select": "choice",
+    "dropdown": "choice",
+    "dropdown_native": "choice",
+    "dropdown_custom": "choice",
+    "text": "short_text",
+    "input_text": "short_text",
+    "email": "short_text",
+    "tel": "short_text",
+    "url": "short_text",
+    "number": "short_text",
+    "date": "short_text",
+    "textarea": "long_text",
+}
+
+# Written answers even when the field is a single-line input
+LONG_ANSWER_INTENTS = {"experience.whyFit", "experience.summary", "personal.additionalInfo"}
+
+
+def route_for(question: str, options: Optional[List[str]], field_type: Optional[str]) -> Route:
+    if not config.MODEL_ROUTING:
+        return ROUTES["long_text"]
+    if options:
+        return ROUTES["choice"]
+    # Unknown field types get the full budget
+    name = FIELD_TYPE_ROUTES.get((field_type or "").lower(), "long_text")
+    if name == "short_text" and guess_intent(question) in LONG_ANSWER_INTENTS:
+        name = "long_text"
+    return ROUTES[name]
+
+
+class RoutingStats:
+    """Questions answered per route"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: Counter = Counter()
+
+    def record(self, route: Route, questions: int = 1):
+        with self._lock:
+            self._counts[route.name] += questions
+
+    def stats(self) -> dict:
+        return {
+            "enabled": config.MODEL_ROUTING,
+            "routes": {
+                name: {
+                    "modelId": route.model_id,
+                    "maxNewTokens": route.max_new_tokens,
+                    "questions": self._counts[name],
+                }
+                for name, route in ROUTES.items()
+            },
+        }
+
+
+routing_stats = RoutingStats()
@@ -8,6 +8,7 @@ class AIRequest(BaseModel):
     options: List[str] | None = None
     fieldType: str
     userProfile: dict
+    required: bool = False  # required form field: served first when Bedrock calls queue up
 
 class AIResponse(BaseModel):
     """AI predicted answer"""
@@ -17,6 +18,23 @@ class AIResponse(BaseModel):
     intent: str | None = None
     isNewIntent: bool = False
     suggestedIntentName: str | None = None
+    intentSource: str | None = None  # "model", "classifier", "rules" or "profile"; classifier intents are never learned
+
+class BatchQuestion(BaseModel):
+    """One question of a batch prediction (profile is shared by the batch)"""
+    question: str
+    options: List[str] | None = None
+    fieldType: str
+    required: bool = False
+
+class AIBatchRequest(BaseModel):
+    """Request to predict answers for a whole application form"""
+    questions: List[BatchQuestion]
+    userProfile: dict
+
+class AIBatchResponse(BaseModel):
+    """Answers aligned with the order of AIBatchRequest.questions"""
+    answers: List[AIResponse]
 
 # ===== Pattern Models =====
 class Pattern(BaseModel):
@@ -31,6 +49,8 @@ class Pattern(BaseModel):
     usageCount: int = 1
     createdAt: str | None = None
     lastUsed: str | None = None
+    revision: int | None = None  # assigned by the store on every create/update
+    intentSource: str | None = None  # "model", "rules" or "user"; only model / user intents train the classifier
 
 class PatternSearchRequest(BaseModel):
     """Pattern search query"""
@@ -0,0 +1,214 @@
+"""
+Pattern Index - Hash + inverted token indexes over stored patterns
+Exact questions resolve in O(1); for fuzzy matching only patterns that
+share tokens with the query are scored
+"""
+import heapq
+import math
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+
+def normalize_question(text: str) -> str:
+    return (text or '').lower().strip()
+
+
+def tokenize(text: str) -> FrozenSet[str]:
+    """Same word split search_pattern has always used"""
+    return frozenset((text or '').lower().strip().split())
+
+
+def similarity(q_words: FrozenSet[str], p_words: FrozenSet[str]) -> float:
+    """Word overlap relative to the longer of the two questions"""
+    if not q_words or not p_words:
+        return 0.0
+    return len(q_words & p_words) / max(len(q_words), len(p_words))
+
+
+def rank(question: str, candidates: Iterable[Tuple[int, dict]], k: int,
+         threshold: float) -> List[Tuple[float, dict]]:
+    """
+    Score (seq, pattern) candidates from another source (e.g. a full-text index)
+    exactly like PatternIndex.top_k: best k, exact matches then older patterns win ties.
+    """
+    q_words = tokenize(question)
+    if k <= 0 or not q_words:
+        return []
+
+    normalized = normalize_question(question)
+    # seq is unique, so comparisons never reach the pattern dict
+    heap: List[Tuple[float, bool, int, dict]] = []
+    for seq, pattern in candidates:
+        score = similarity(q_words, tokenize(pattern.get('questionPattern', '')))
+        if score < threshold:
+            continue
+        is_exact = normalize_question(pattern.get('questionPattern', '')) == normalized
+        entry = (score, is_exact, -seq, pattern)
+        if len(heap) < k:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+
+    return [(score, pattern) for score, _, _, pattern in sorted(heap, reverse=True)]
+
+
+class PatternIndex:
+    """
+    normalized question -> patterns and (intent, question) -> pattern hash maps,
+    plus token -> pattern postings with pre-tokenized word sets cached per pattern.
+    Postings are bucketed by word count so the length filter prunes whole buckets.
+    """
+
+    def __init__(self):
+        self._seq = 0
+        # Pattern dicts are keyed by object identity; seq keeps insertion order
+        self._seq_of: Dict[int, int] = {}
+        self._docs: Dict[int, dict] = {}
+        self._words: Dict[int, FrozenSet[str]] = {}
+        self._postings: Dict[str, Dict[int, Set[int]]] = {}
+        # Exact lookups; seq lists stay in insertion order
+        self._keys: Dict[int, Tuple[str, str]] = {}
+        self._exact: Dict[str, List[int]] = {}
+        self._by_intent: Dict[Tuple[str, str], List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def clear(self):
+        self.__init__()
+
+    def _post(self, seq: int, words: FrozenSet[str]):
+        n = len(words)
+        for w in words:
+            self._postings.setdefault(w, {}).setdefault(n, set()).add(seq)
+
+    def _unpost(self, seq: int, words: FrozenSet[str]):
+        n = len(words)
+        for w in words:
+            buckets = self._postings.get(w)
+            if buckets is None or n not in buckets:
+                continue
+            buckets[n].discard(seq)
+            if not buckets[n]:
+                del buckets[n]
+                if not buckets:
+                    del self._postings[w]
+
+    def _key(self, pattern: dict) -> Tuple[str, str]:
+        return (pattern.get('intent') or '', normalize_question(pattern.get('questionPattern', '')))
+
+    def _hash(self, seq: int, key: Tuple[str, str]):
+        self._keys[seq] = key
+        self._exact.setdefault(key[1], []).append(seq)
+        self._by_intent.setdefault(key, []).append(seq)
+
+    def _unhash(self, seq: int, key: Tuple[str, str]):
+        for table, k in ((self._exact, key[1]), (self._by_intent, key)):
+            seqs = table.get(k)
+            if seqs and seq in seqs:
+                seqs.remove(seq)
+                if not seqs:
+                    del table[k]
+
+    def add(self, pattern: dict):
+        self._seq += 1
+        seq = self._seq
+        words = tokenize(pattern.get('questionPattern', ''))
+        self._seq_of[id(pattern)] = seq
+        self._docs[seq] = pattern
+        self._words[seq] = words
+        self._post(seq, words)
+        self._hash(seq, self._key(pattern))
+
+    def update(self, pattern: dict):
+        """Re-tokenize a pattern whose questionPattern may have changed"""
+        seq = self._seq_of.get(id(pattern))
+        if seq is None:
+            self.add(pattern)
+            return
+
+        key = self._key(pattern)
+        if key != self._keys[seq]:
+            self._unhash(seq, self._keys[seq])
+            self._hash(seq, key)
+            # Keep the exact-match lists in insertion order
+            self._exact[key[1]].sort()
+            self._by_intent[key].sort()
+
+        words = tokenize(pattern.get('questionPattern', ''))
+        if words == self._words[seq]:
+            return
+        self._unpost(seq, self._words[seq])
+        self._post(seq, words)
+        self._words[seq] = words
+
+    def exact(self, question: str) -> Optional[dict]:
+        """Earliest pattern whose normalized question equals `question`"""
+        seqs = self._exact.get(normalize_question(question))
+        return self._docs[seqs[0]] if seqs else None
+
+    def find(self, intent: str, question: str) -> Optional[dict]:
+        """Pattern stored under (intent, normalized question), for upserts"""
+        seqs = self._by_intent.get((intent or '', normalize_question(question)))
+        return self._docs[seqs[0]] if seqs else None
+
+    def candidates(self, q_words: FrozenSet[str], threshold: float) -> Set[int]:
+        """
+        Patterns that can still reach `threshold`.
+        Overlap <= min(|q|, |p|), so |p| must lie within [t*|q|, |q|/t] (length filter).
+        A match needs at least ceil(t*|q|) shared words, so it must contain one of
+        the (|q| - that + 1) rarest query words (prefix filtering).
+        """
+        n_q = len(q_words)
+        min_len = math.ceil(threshold * n_q - 1e-9)
+        max_len = math.floor(n_q / threshold + 1e-9) if threshold > 0 else math.inf
+
+        postings = []
+        for w in q_words:
+            buckets = self._postings.get(w)
+            if not buckets:
+                continue
+            sets = [seqs for n, seqs in buckets.items() if min_len <= n <= max_len]
+            if sets:
+                postings.append((sum(len(s) for s in sets), sets))
+        if not postings:
+            return set()
+
+        postings.sort(key=lambda p: p[0])
+        required = max(1, min_len)
+        # Words missing from the index are the rarest of all and contribute nothing
+        prefix = n_q - required + 1 - (n_q - len(postings))
+        if prefix <= 0:
+            return set()
+
+        result: Set[int] = set()
+        for _, sets in postings[:prefix]:
+            for seqs in sets:
+                result |= seqs
+        return result
+
+    def top_k(self, question: str, k: int, threshold: float) -> List[Tuple[float, dict]]:
+        """
+        Best-scoring k patterns reaching `threshold`, as (score, pattern), best first.
+        Uses a bounded min-heap of size k; ties go to exact matches, then to older patterns.
+        """
+        q_words = tokenize(question)
+        if k <= 0 or not q_words:
+            return []
+
+        exact = set(self._exact.get(normalize_question(question), ()))
+        heap: List[Tuple[float, int, int, int]] = []
+        words = self._words
+        n_q = len(q_words)
+        for seq in self.candidates(q_words, threshold):
+            p_words = words[seq]
+            # Inlined similarity(): this loop is the hot path
+            score = len(q_words & p_words) / (n_q if n_q >= len(p_words) else len(p_words))
+            if score < threshold:
+                continue
+            entry = (score, seq in exact, -seq, seq)
+            if len(heap) < k:
+                heapq.heappush(heap, entry)
+            elif entry > heap[0]:
+                heapq.heapreplace(heap, entry)
+
+        return [(score, self._docs[seq]) for score, _, _, seq in sorted(heap, reverse=True)]
@@ -2,12 +2,14 @@
 Pattern Service - Pattern storage and retrieval
 Handles learned question-answer patterns
 """
-import json
 import os
 from datetime import datetime
-from typing import List, Optional
+from typing import Iterator, List, Optional, Tuple
 from models import Pattern
 from config import config
+from pattern_store import pattern_store
+from vector_index import vector_index
+from intent_classifier import canonical_intent, intent_classifier
 
 # Storage file path (from config)
 PATTERNS_FILE = config.PATTERNS_FILE
@@ -15,80 +17,82 @@ PATTERNS_FILE = config.PATTERNS_FILE
 # Shareable intents (from config)
 SHAREABLE_INTENTS = config.SHAREABLE_INTENTS
 
-def ensure_data_dir():
-    """Ensure data directory exists"""
-    os.makedirs(config.DATA_DIR, exist_ok=True)
-    if not os.path.exists(PATTERNS_FILE):
-        with open(PATTERNS_FILE, 'w') as f:
-            json.dump({"patterns": []}, f)
-
 def is_shareable_intent(intent: str) -> bool:
     """Check if intent is shareable for privacy"""
     return intent in SHAREABLE_INTENTS
 
 def read_patterns() -> List[dict]:
-    """Read all patterns from file"""
-    ensure_data_dir()
-    try:
-        with open(PATTERNS_FILE, 'r') as f:
-            data = json.load(f)
-            return data.get('patterns', [])
-    except:
-        return []
+    """Read all patterns (served from memory)"""
+    return pattern_store.all()
+
+def iter_patterns(since: Optional[int] = None) -> Iterator[dict]:
+    """Patterns one at a time (all, or those changed after revision `since`) for streaming sync"""
+    if since is None:
+        return pattern_store.iter_all()
+    return iter(pattern_store.changes_since(since))
 
 def write_patterns(patterns: List[dict]):
-    """Write patterns to file"""
-    ensure_data_dir()
-    with open(PATTERNS_FILE, 'w') as f:
-        json.dump({"patterns": patterns}, f, indent=2)
+    """Replace all patterns (persisted by the store's write-behind flush)"""
+    pattern_store.replace_all(patterns)
 
 def search_pattern(question: str) -> Optional[dict]:
     """Search for matching pattern by question text"""
-    patterns = read_patterns()
-    question_lower = question.lower().strip()
+    # Exact match (hash lookup)
+    exact = pattern_store.exact_match(question)
+    if exact is not None:
+        return exact
     
-    # Find exact or fuzzy match
-    for pattern in patterns:
-        pattern_question = pattern.get('questionPattern', '').lower().strip()
-        
-        # Exact match
-        if pattern_question == question_lower:
+    # Best fuzzy match (configurable threshold)
+    matches = search_patterns(question, k=1)
+    if matches:
+        return matches[0][1]
+
+    # Paraphrases (semantic vector search)
+    return semantic_match(question)
+
+def semantic_match(question: str) -> Optional[dict]:
+    """
+    Nearest stored pattern by embedding, accepted when its intent agrees with the
+    local classifier (or, if the classifier is unsure, at a much higher similarity)
+    """
+    if not config.SEMANTIC_SEARCH:
+        return None
+    threshold = config.SEMANTIC_MATCH_THRESHOLD
+    known_intent = intent_classifier.confident_intent(question)
+    for score, pattern in vector_index.search(question, 5, threshold):
+        if known_intent is not None and canonical_intent(pattern.get('intent')) == known_intent:
+            return pattern
+        if known_intent is None and score >= (1 + threshold) / 2:
             return pattern
-        
-        # Fuzzy match (configurable threshold)
-        q_words = set(question_lower.split())
-        p_words = set(pattern_question.split())
-        
-        if len(q_words) > 0 and len(p_words) > 0:
-            matched_words = q_words.intersection(p_words)
-            similarity = len(matched_words) / max(len(q_words), len(p_words))
-            
-            if similarity >= config.FUZZY_MATCH_THRESHOLD:
-                return pattern
-    
     return None
 
+def search_patterns(question: str, k: int = 5) -> List[Tuple[float, dict]]:
+    """Top-k (score, pattern) matches, best first"""
+    # Scored only over patterns that share words with the question (inverted index)
+    return pattern_store.top_k(question, k, config.FUZZY_MATCH_THRESHOLD)
+
 def save_pattern(pattern: Pattern) -> bool:
     """Save new pattern or update existing"""
     if not is_shareable_intent(pattern.intent):
         return False  # Don't save private intents
     
-    patterns = read_patterns()
-    
-    # Check if pattern exists
-    existing_index = -1
-    for i, p in enumerate(patterns):
-        if (p.get('intent') == pattern.intent and 
-            p.get('questionPattern', '').lower() == pattern.questionPattern.lower()):
-            existing_index = i
-            break
+    # Hold the store lock across the read-modify-write
+    with pattern_store.lock:
+        saved = _upsert_pattern(pattern)
+    if config.SEMANTIC_SEARCH:
+        # Embed the new / changed question (incremental, from the revision feed)
+        vector_index.refresh()
+    return saved
+
+def _upsert_pattern(pattern: Pattern) -> bool:
+    # Check if pattern exists (hash lookup on intent + question)
+    existing = pattern_store.find(pattern.intent, pattern.questionPattern)
     
     pattern_dict = pattern.dict()
     pattern_dict['lastUsed'] = datetime.now().isoformat()
     
-    if existing_index >= 0:
+    if existing is not None:
         # Update existing pattern
-        existing = patterns[existing_index]
         existing['usageCount'] = existing.get('usageCount', 0) + 1
         existing['lastUsed'] = pattern_dict['lastUsed']
         
@@ -107,32 +111,28 @@ def save_pattern(pattern: Pattern) -> bool:
                 if not found:
                     existing['answerMappings'].append(new_mapping)
         
-        patterns[existing_index] = existing
+        pattern_store.updated(existing)
     else:
         # Add new pattern
         pattern_dict['id'] = f"pattern_{datetime.now().timestamp()}_{os.urandom(4).hex()}"
         pattern_dict['createdAt'] = datetime.now().isoformat()
         pattern_dict['usageCount'] = 1
-        patterns.append(pattern_dict)
+        pattern_store.add(pattern_dict)
     
-    write_patterns(patterns)
     return True
 
+def get_changes_since(revision: int) -> List[dict]:
+    """Patterns created or updated after revision (incremental sync)"""
+    return pattern_store.changes_since(revision)
+
+def get_revision() -> int:
+    """Latest pattern revision, used as the sync cursor"""
+    return pattern_store.revision()
+
 def get_stats() -> dict:
     """Get pattern statistics"""
-    patterns = read_patterns()
-    
-    intent_breakdown = {}
-    for p in patterns:
-        intent = p.get('intent', 'unknown')
-        intent_breakdown[intent] = intent_breakdown.get(intent, 0) + 1
-    
     return {
-        "totalPatterns": len(patterns),
-        "intentBreakdown": intent_breakdown,
-        "topPatterns": sorted(
-            patterns, 
-            key=lambda x: x.get('usageCount', 0), 
-            reverse=True
-        )[:10]
+        "totalPatterns": pattern_store.count(),
+        "intentBreakdown": pattern_store.intent_counts(),
+        "topPatterns": pattern_store.top_used(10)
     }
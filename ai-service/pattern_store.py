@@ -0,0 +1,528 @@
+"""
+Pattern Store - Storage backends behind pattern_service
+PATTERNS_BACKEND selects the implementation:
+- "json" (default): JsonPatternStore below
+- "sqlite": SqlitePatternStore (sqlite_pattern_store.py)
+
+JsonPatternStore serves patterns from RAM and persists them by a
+background thread:
+- changed patterns are appended as compact JSONL records to a journal (WAL)
+- at startup the journal is replayed on top of the last snapshot
+- once the journal passes a size or age threshold it is compacted into a
+  new snapshot (atomic temp file + rename) and truncated
+- with PATTERNS_MULTIPROCESS, writers in all worker processes take an
+  exclusive file lock, catch up on each other's journal records first and
+  write through; every worker polls the snapshot identity and journal size
+  each flush interval to pick up changes (reloading after a compaction)
+"""
+import atexit
+import bisect
+import heapq
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from config import config
+from pattern_index import PatternIndex
+
+logger = logging.getLogger("ai-service")
+
+
+def _record_key(pattern: dict) -> str:
+    """Journal key of a pattern: its id, or intent + question for legacy patterns without one"""
+    if pattern.get('id'):
+        return pattern['id']
+    return f"{pattern.get('intent') or ''}|{(pattern.get('questionPattern') or '').lower().strip()}"
+
+
+class PatternStore(ABC):
+    """
+    Storage interface used by pattern_service.
+    Pattern dicts returned by reads may be modified and handed back to updated().
+    """
+
+    # Held by callers across a read-modify-write (re-entrant)
+    lock: threading.RLock
+
+    @abstractmethod
+    def all(self) -> List[dict]:
+        """All patterns in insertion order"""
+
+    def iter_all(self) -> Iterator[dict]:
+        """All patterns one at a time, for streaming exports"""
+        yield from self.all()
+
+    @abstractmethod
+    def count(self) -> int:
+        """Number of stored patterns"""
+
+    @abstractmethod
+    def exact_match(self, question: str) -> Optional[dict]:
+        """Pattern whose normalized question equals question"""
+
+    @abstractmethod
+    def find(self, intent: str, question: str) -> Optional[dict]:
+        """Pattern stored for (intent, question), used for upserts"""
+
+    @abstractmethod
+    def top_k(self, question: str, k: int, threshold: float) -> List[Tuple[float, dict]]:
+        """Best k (score, pattern) pairs whose word overlap reaches threshold"""
+
+    @abstractmethod
+    def intent_counts(self) -> Dict[str, int]:
+        """Number of patterns per intent"""
+
+    @abstractmethod
+    def top_used(self, n: int) -> List[dict]:
+        """n patterns with the highest usageCount"""
+
+    @abstractmethod
+    def revision(self) -> int:
+        """Latest revision; every add/update gets the next one (pattern['revision'])"""
+
+    @abstractmethod
+    def changes_since(self, revision: int) -> List[dict]:
+        """Patterns created or updated after revision, oldest change first"""
+
+    @abstractmethod
+    def add(self, pattern: dict):
+        """Store a new pattern (assigns its revision)"""
+
+    @abstractmethod
+    def updated(self, pattern: dict):
+        """Persist changes made to a pattern returned by a read (assigns a new revision)"""
+
+    @abstractmethod
+    def replace_all(self, patterns: List[dict]):
+        """Replace the whole store"""
+
+    def start(self):
+        """Called on app startup"""
+
+    def flush(self):
+        """Make pending changes durable"""
+
+    def close(self):
+        """Called on app shutdown"""
+
+
+class _ProcessSharedLock:
+    """
+    Cross-process transaction lock for the JSON store (PATTERNS_MULTIPROCESS).
+    Outermost enter: in-process RLock + exclusive flock, then catch up on changes
+    written by other workers. Outermost exit: write this worker's pending changes.
+    Threads of one process share the flock, so it is only ever taken under the RLock.
+    """
+
+    def __init__(self, store: "JsonPatternStore", lock_path: str):
+        self._store = store
+        self._lock_path = lock_path
+        self._rlock = threading.RLock()
+        self._depth = 0
+        self._fd: Optional[int] = None
+
+    def __enter__(self):
+        import fcntl
+
+        self._rlock.acquire()
+        self._depth += 1
+        if self._depth == 1:
+            try:
+                if self._fd is None:
+                    os.makedirs(os.path.dirname(self._lock_path), exist_ok=True)
+                    self._fd = os.open(self._lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+                self._store._sync_from_disk()
+            except BaseException:
+                self._release()
+                raise
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._depth == 1:
+            try:
+                self._store._write_out()
+            finally:
+                self._release()
+        else:
+            self._depth -= 1
+            self._rlock.release()
+
+    def _release(self):
+        import fcntl
+
+        if self._depth == 1 and self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._depth -= 1
+        self._rlock.release()
+
+
+class JsonPatternStore(PatternStore):
+    """Patterns held in memory, persisted to a JSON snapshot + JSONL journal"""
+
+    def __init__(self, path: str, journal_path: str, flush_interval: float,
+                 compact_bytes: int, compact_interval: float,
+                 lock_path: Optional[str] = None):
+        self.path = path
+        self.journal_path = journal_path
+        self.flush_interval = flush_interval
+        self.compact_bytes = compact_bytes
+        self.compact_interval = compact_interval
+        # Guards the in-memory state
+        self._mutex = threading.RLock()
+        # Held by callers across a read-modify-write; with a lock_path it also
+        # serializes writers across worker processes
+        self.shared = lock_path is not None
+        self.lock = _ProcessSharedLock(self, lock_path) if self.shared else self._mutex
+        # Serializes disk writes so an older snapshot never overwrites a newer one
+        self._write_lock = threading.Lock()
+        self._patterns: List[dict] = []
+        self._by_key: Dict[str, dict] = {}
+        self.index = PatternIndex()
+        # (revision, journal key) in revision order; entries go stale when a pattern
+        # gets a newer revision and are skipped on read
+        self._changes: List[Tuple[int, str]] = []
+        self._revision = 0
+        self._loaded = False
+        # Patterns changed since the last flush, by journal key
+        self._pending: Dict[str, dict] = {}
+        # Set when the journal cannot express a change (replace_all, failed append)
+        self._needs_compaction = False
+        # Bytes of the journal already applied to memory
+        self._journal_bytes = 0
+        # (inode, mtime, size) of the snapshot in memory; changes when any worker compacts
+        self._snapshot_id: Optional[tuple] = None
+        self._last_compaction = time.monotonic()
+        self._stop = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+
+    # ---------- loading ----------
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._mutex:
+            if self._loaded:
+                return
+            self._reload()
+            self._loaded = True
+            atexit.register(self.flush)
+
+    def _reload(self):
+        """Rebuild memory from the snapshot + the whole journal"""
+        self._patterns = self._load_file()
+        self._by_key = {_record_key(p): p for p in self._patterns}
+        self._journal_bytes = 0
+        replayed = self._apply_journal(rebuild=False)
+        # Local changes not written yet survive a reload
+        for p in self._pending.values():
+            self._put(p, rebuild=False)
+        self._rebuild_index()
+        if replayed:
+            logger.info(f"📜 Replayed {replayed} journal records from {self.journal_path}")
+
+    def _load_file(self) -> List[dict]:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        if not os.path.exists(self.path):
+            self._snapshot_id = None
+            return []
+        try:
+            with open(self.path, 'r') as f:
+                self._snapshot_id = self._file_id(os.fstat(f.fileno()))
+                return json.load(f).get('patterns', [])
+        except Exception as e:
+            logger.warning(f"⚠ Could not read {self.path}: {e}")
+            return []
+
+    @staticmethod
+    def _file_id(st: os.stat_result) -> tuple:
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _apply_journal(self, rebuild: bool = True) -> int:
+        """Apply journal records past _journal_bytes (puts are idempotent)"""
+        if not os.path.exists(self.journal_path):
+            return 0
+
+        with open(self.journal_path, 'rb') as f:
+            f.seek(self._journal_bytes)
+            data = f.read()
+        # Only complete lines; a partial tail is still being written (or torn by a crash)
+        end = data.rfind(b"\n") + 1
+        applied = 0
+        for line in data[:end].splitlines():
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get('op') != 'put' or not isinstance(record.get('pattern'), dict):
+                continue
+            self._put(record['pattern'], rebuild)
+            applied += 1
+        self._journal_bytes += end
+        return applied
+
+    def _put(self, pattern: dict, rebuild: bool):
+        """Insert or overwrite a pattern by journal key, keeping dict identity"""
+        key = _record_key(pattern)
+        existing = self._by_key.get(key)
+        if existing is None:
+            self._by_key[key] = pattern
+            self._patterns.append(pattern)
+            if rebuild:
+                self.index.add(pattern)
+                self._track(pattern)
+        elif existing is not pattern:
+            existing.clear()
+            existing.update(pattern)
+            if rebuild:
+                self.index.update(existing)
+                self._track(existing)
+
+    def _rebuild_index(self):
+        self.index.clear()
+        for p in self._patterns:
+            self.index.add(p)
+        self._rebuild_changes()
+
+    def _rebuild_changes(self):
+        self._changes = sorted((p.get('revision') or 0, _record_key(p)) for p in self._patterns)
+        self._revision = max((p.get('revision') or 0 for p in self._patterns), default=0)
+
+    def _track(self, pattern: dict):
+        revision = pattern.get('revision') or 0
+        self._revision = max(self._revision, revision)
+        bisect.insort(self._changes, (revision, _record_key(pattern)))
+        if len(self._changes) > 2 * len(self._patterns) + 1000:
+            self._rebuild_changes()
+
+    def _touch(self, pattern: dict):
+        self._revision += 1
+        pattern['revision'] = self._revision
+        self._track(pattern)
+
+    def _sync_from_disk(self):
+        """Catch up on changes written by other workers (called under the shared lock)"""
+        with self._mutex:
+            if not self._loaded:
+                self._ensure_loaded()
+            snapshot_id = self._file_id(os.stat(self.path)) if os.path.exists(self.path) else None
+            journal_size = os.path.getsize(self.journal_path) if os.path.exists(self.journal_path) else 0
+            if snapshot_id != self._snapshot_id or journal_size < self._journal_bytes:
+                # Another worker compacted the journal
+                self._reload()
+            elif journal_size > self._journal_bytes:
+                self._apply_journal()
+
+    # ---------- reads ----------
+
+    def all(self) -> List[dict]:
+        """Snapshot of all patterns (the list is a copy, the dicts are shared)"""
+        self._ensure_loaded()
+        with self._mutex:
+            return list(self._patterns)
+
+    def count(self) -> int:
+        self._ensure_loaded()
+        return len(self._patterns)
+
+    def exact_match(self, question: str) -> Optional[dict]:
+        """Pattern whose normalized question equals question (O(1))"""
+        self._ensure_loaded()
+        with self._mutex:
+            return self.index.exact(question)
+
+    def find(self, intent: str, question: str) -> Optional[dict]:
+        """Pattern stored for (intent, question), used for upserts (O(1))"""
+        self._ensure_loaded()
+        with self._mutex:
+            return self.index.find(intent, question)
+
+    def top_k(self, question: str, k: int, threshold: float) -> List[Tuple[float, dict]]:
+        """Best k (score, pattern) pairs whose word overlap reaches threshold"""
+        self._ensure_loaded()
+        with self._mutex:
+            return self.index.top_k(question, k, threshold)
+
+    def revision(self) -> int:
+        self._ensure_loaded()
+        return self._revision
+
+    def changes_since(self, revision: int) -> List[dict]:
+        self._ensure_loaded()
+        with self._mutex:
+            start = bisect.bisect_left(self._changes, (revision + 1, ''))
+            changed = []
+            for rev, key in self._changes[start:]:
+                pattern = self._by_key.get(key)
+                # Skip stale entries of patterns that changed again later
+                if pattern is not None and (pattern.get('revision') or 0) == rev:
+                    changed.append(pattern)
+            return changed
+
+    def intent_counts(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for p in self.all():
+            intent = p.get('intent', 'unknown')
+            counts[intent] = counts.get(intent, 0) + 1
+        return counts
+
+    def top_used(self, n: int) -> List[dict]:
+        return heapq.nlargest(n, self.all(), key=lambda x: x.get('usageCount', 0))
+
+    # ---------- writes ----------
+
+    def add(self, pattern: dict):
+        self._ensure_loaded()
+        with self._mutex:
+            self._patterns.append(pattern)
+            self._by_key[_record_key(pattern)] = pattern
+            self.index.add(pattern)
+            self._touch(pattern)
+            self._pending[_record_key(pattern)] = pattern
+
+    def updated(self, pattern: dict):
+        """Record that a stored pattern was modified in place"""
+        with self._mutex:
+            self.index.update(pattern)
+            self._touch(pattern)
+            self._pending[_record_key(pattern)] = pattern
+
+    def replace_all(self, patterns: List[dict]):
+        self._ensure_loaded()
+        with self.lock, self._mutex:
+            self._patterns = list(patterns)
+            self._by_key = {_record_key(p): p for p in self._patterns}
+            # Everything changed: each pattern gets a revision past the current one
+            for p in self._patterns:
+                self._revision += 1
+                p['revision'] = self._revision
+            self._rebuild_index()
+            self._pending.clear()
+            self._needs_compaction = True
+
+    # ---------- persistence ----------
+
+    def _compaction_due(self) -> bool:
+        if self._needs_compaction:
+            return True
+        if self._journal_bytes >= self.compact_bytes:
+            return True
+        return self._journal_bytes > 0 and time.monotonic() - self._last_compaction >= self.compact_interval
+
+    def flush(self, compact: bool = False):
+        """Append changed patterns to the journal, compacting it when due"""
+        if compact:
+            with self._mutex:
+                self._needs_compaction = True
+        if self.shared:
+            # Entering catches up with other workers, leaving writes our changes
+            with self.lock:
+                pass
+        else:
+            self._write_out()
+
+    def _write_out(self):
+        with self._write_lock:
+            with self._mutex:
+                compact = self._compaction_due()
+                if compact:
+                    payload = json.dumps({"patterns": self._patterns}, indent=2)
+                elif self._pending:
+                    payload = "".join(
+                        json.dumps({"op": "put", "pattern": p}, separators=(',', ':')) + "\n"
+                        for p in self._pending.values()
+                    )
+                else:
+                    return
+                self._pending.clear()
+                self._needs_compaction = False
+
+            try:
+                if compact:
+                    self._compact(payload)
+                else:
+                    self._append_journal(payload)
+            except Exception as e:
+                with self._mutex:
+                    # The journal may be torn; rewrite everything next time
+                    self._needs_compaction = True
+                logger.warning(f"⚠ Failed flushing patterns: {e}")
+
+    def _append_journal(self, payload: str):
+        with open(self.journal_path, 'a') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        self._journal_bytes += len(payload.encode())
+
+    def _compact(self, snapshot: str):
+        """Write a new snapshot, then drop the journal it supersedes"""
+        self._atomic_write(snapshot)
+        self._snapshot_id = self._file_id(os.stat(self.path))
+        if os.path.exists(self.journal_path):
+            os.truncate(self.journal_path, 0)
+        self._journal_bytes = 0
+        self._last_compaction = time.monotonic()
+
+    def _atomic_write(self, payload: str):
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".patterns.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def start(self):
+        """Load the store and start the background flusher (called on app startup)"""
+        self._ensure_loaded()
+        if self._flusher is None:
+            self._stop.clear()
+            self._flusher = threading.Thread(target=self._flush_loop, name="pattern-flusher", daemon=True)
+            self._flusher.start()
+
+    def close(self):
+        """Stop the flusher and compact pending changes (called on app shutdown)"""
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        self.flush(compact=self._journal_bytes > 0 or bool(self._pending))
+
+
+def create_pattern_store() -> PatternStore:
+    """Build the backend selected by PATTERNS_BACKEND"""
+    backend = config.PATTERNS_BACKEND.lower()
+    if backend == "sqlite":
+        from sqlite_pattern_store import SqlitePatternStore
+        return SqlitePatternStore(config.PATTERNS_DB_FILE, import_from=config.PATTERNS_FILE)
+    if backend != "json":
+        raise ValueError(f"Unknown PATTERNS_BACKEND: {config.PATTERNS_BACKEND}")
+    return JsonPatternStore(
+        config.PATTERNS_FILE,
+        config.PATTERNS_JOURNAL_FILE,
+        config.PATTERNS_FLUSH_INTERVAL,
+        config.PATTERNS_COMPACT_BYTES,
+        config.PATTERNS_COMPACT_INTERVAL,
+        lock_path=config.PATTERNS_LOCK_FILE if config.PATTERNS_MULTIPROCESS else None,
+    )
+
+
+# Global store instance
+pattern_store = create_pattern_store()
@@ -0,0 +1,105 @@
+"""
+Prediction Cache - LRU + TTL cache of model answers
+Keyed by normalized question, sorted options, field type and a fingerprint of
+the user profile, so repeat fills skip Bedrock without sharing answers across users
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from config import config
+from models import AIResponse
+
+
+def profile_fingerprint(user_profile: dict) -> str:
+    """Stable hash of a profile (key order does not matter)"""
+    encoded = json.dumps(user_profile or {}, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def prediction_key(question: str, options: Optional[List[str]], field_type: str,
+                   fingerprint: str) -> str:
+    normalized = " ".join((question or '').lower().split())
+    encoded = json.dumps(
+        [normalized, sorted(options or []), field_type or '', fingerprint],
+        separators=(',', ':'),
+    )
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def is_cacheable(response: AIResponse) -> bool:
+    """Errors, missing-credential and Bedrock-unavailable replies (low confidence) are retried, not cached"""
+    return bool(response.answer) and response.confidence >= config.MIN_CONFIDENCE_THRESHOLD
+
+
+class PredictionCache:
+    """Thread-safe LRU of AIResponse with a per-entry time to live"""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, AIResponse]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def get(self, key: str) -> Optional[AIResponse]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, response = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        # Fresh object per hit, callers may modify it
+        return response.model_copy()
+
+    def put(self, key: str, response: AIResponse):
+        if not self.enabled or not is_cacheable(response):
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, response.model_copy())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "maxEntries": self.max_entries,
+            "ttlSeconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+# Global cache instance
+prediction_cache = PredictionCache(
+    max_entries=config.PREDICTION_CACHE_SIZE,
+    ttl_seconds=config.PREDICTION_CACHE_TTL,
+)
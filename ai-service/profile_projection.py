@@ -0,0 +1,203 @@
+"""
+Profile Projection - Only the profile fields a question needs go into the prompt
+The likely intent is guessed from the question text; its family (personal,
+workAuthorization, eeo, experience) decides which profile keys are kept.
+Unknown questions still get the full profile.
+"""
+import json
+import logging
+import re
+import threading
+from typing import Iterable, List, Optional, Set, Tuple
+
+from config import config
+from intent_classifier import intent_classifier
+
+logger = logging.getLogger("ai-service")
+
+
+# -----------------------------
+# INTENT GUESSING (question text only, checked in order)
+# -----------------------------
+
+INTENT_RULES: List[Tuple[str, "re.Pattern"]] = [
+    (intent, re.compile(pattern)) for intent, pattern in [
+        ("eeo.gender", r"\bgender\b|\bsex\b|pronoun"),
+        ("eeo.race", r"\brace\b|ethnic|hispanic|latin[oa]"),
+        ("eeo.veteran", r"veteran|military|armed forces"),
+        ("eeo.disability", r"disabilit"),
+        ("workAuthorization.needsSponsorship", r"sponsor|\bvisa\b"),
+        ("workAuthorization.authorizedUS",
+         r"authori[sz]ed to work|work authori[sz]ation|legally (?:eligible|authori[sz]ed)|eligible to work|right to work"),
+        ("personal.desiredSalary", r"salary|compensation|pay expectation|expected pay|desired pay"),
+        ("personal.linkedin", r"linkedin"),
+        ("personal.email", r"e-?mail"),
+        ("personal.phone", r"phone|mobile number|cell number"),
+        ("personal.firstName", r"first name|given name|forename"),
+        ("personal.lastName", r"last name|surname|family name"),
+        ("personal.city", r"\bcity\b"),
+        ("personal.state", r"\bstate\b|\bprovince\b"),
+        ("personal.country", r"\bcountry\b"),
+        ("experience.whyFit",
+         r"strong fit|why (?:are )?you|why should we hire|why do you want|why are you interested"),
+        ("personal.additionalInfo", r"anything else|additional information|know about you"),
+        ("experience.summary", r"experience|years of|background|tell us about yourself|summary"),
+    ]
+]
+
+
+def rule_intent(question: str) -> str:
+    """Intent from the keyword rules alone, or "unknown" """
+    q = " ".join((question or "").lower().split())
+    for intent, pattern in INTENT_RULES:
+        if pattern.search(q):
+            return intent
+    return "unknown"
+
+
+def guess_intent(question: str) -> str:
+    """Most likely allowed intent: keyword rules, then the local classifier, else "unknown" """
+    intent = rule_intent(question)
+    if intent == "unknown":
+        intent = intent_classifier.confident_intent(question) or "unknown"
+    return intent
+
+
+# -----------------------------
+# PROFILE FIELDS PER INTENT FAMILY
+# -----------------------------
+
+# Profile keys (any nesting level) whose normalized name contains one of these
+FAMILY_FIELD_HINTS = {
+    "personal": (
+        "name", "email", "phone", "mobile", "linkedin", "city", "state", "country",
+        "address", "location", "zip", "postal", "website", "portfolio", "github", "url",
+        "salary", "compensation", "contact", "personal",
+    ),
+    "workAuthorization": (
+        "auth", "sponsor", "visa", "citizen", "permit", "immigration", "clearance",
+        "country", "location", "relocat",
+    ),
+    "eeo": (
+        "gender", "race", "ethnic", "hispanic", "latin", "veteran", "military",
+        "disab", "pronoun", "eeo",
+    ),
+    "experience": (
+        "experience", "workhistory", "employ", "job", "title", "role", "position", "company",
+        "skill", "summary", "education", "degree", "school", "university", "project",
+        "resume", "about", "bio", "certif", "achievement", "years", "name",
+    ),
+}
+
+# Intents whose answer draws on more than their own family
+INTENT_FAMILIES = {
+    "personal.desiredSalary": ("personal", "experience"),
+    "personal.additionalInfo": ("experience",),
+}
+
+
+def families_for(intent: str) -> Optional[Tuple[str, ...]]:
+    """Profile families needed for an intent; None means the whole profile"""
+    if intent in INTENT_FAMILIES:
+        return INTENT_FAMILIES[intent]
+    family = intent.split(".", 1)[0]
+    return (family,) if family in FAMILY_FIELD_HINTS else None
+
+
+def _key_matches(key: str, hints: Set[str]) -> bool:
+    normalized = re.sub(r"[^a-z0-9]", "", str(key).lower())
+    return any(hint in normalized for hint in hints)
+
+
+def _compact(value):
+    """Drop empty values (None, "", [], {}) recursively"""
+    if isinstance(value, dict):
+        kept = {k: _compact(v) for k, v in value.items()}
+        return {k: v for k, v in kept.items() if v not in (None, "", [], {})}
+    if isinstance(value, list):
+        kept = [_compact(v) for v in value]
+        return [v for v in kept if v not in (None, "", [], {})]
+    return value
+
+
+def _select(profile: dict, hints: Set[str]) -> dict:
+    """Keys matching a hint are kept whole; other dicts are searched for matching sub-keys"""
+    selected = {}
+    for key, value in profile.items():
+        if _key_matches(key, hints):
+            selected[key] = value
+        elif isinstance(value, dict):
+            nested = _select(value, hints)
+            if nested:
+                selected[key] = nested
+    return selected
+
+
+def project_profile(profile: dict, intents: Iterable[str]) -> Optional[dict]:
+    """Profile restricted to the families of `intents`, or None when the full profile is needed"""
+    hints: Set[str] = set()
+    for intent in intents:
+        families = families_for(intent)
+        if families is None:
+            return None
+        for family in families:
+            hints.update(FAMILY_FIELD_HINTS[family])
+    projected = _compact(_select(profile or {}, hints))
+    return projected or None
+
+
+# -----------------------------
+# PROMPT BLOCK + SAVINGS STATS
+# -----------------------------
+
+class ProjectionStats:
+    """Prompt size of the profile block versus the full indented profile sent before"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.projected = 0
+        self.chars_full = 0
+        self.chars_sent = 0
+
+    def record(self, chars_full: int, chars_sent: int, projected: bool):
+        with self._lock:
+            self.requests += 1
+            self.projected += int(projected)
+            self.chars_full += chars_full
+            self.chars_sent += chars_sent
+
+    def stats(self) -> dict:
+        saved = self.chars_full - self.chars_sent
+        return {
+            "enabled": config.PROFILE_PROJECTION,
+            "requests": self.requests,
+            "projected": self.projected,
+            "fullProfile": self.requests - self.projected,
+            "charsFull": self.chars_full,
+            "charsSent": self.chars_sent,
+            # ~4 characters per token
+            "estimatedTokensSaved": saved // 4,
+        }
+
+
+projection_stats = ProjectionStats()
+
+
+def profile_block(user_profile: dict, questions: Iterable[str]) -> str:
+    """Compact JSON of the profile fields the questions need"""
+    full = json.dumps(user_profile, indent=2)
+    if not config.PROFILE_PROJECTION:
+        projection_stats.record(len(full), len(full), False)
+        return full
+
+    intents = [guess_intent(q) for q in questions]
+    projected = project_profile(user_profile, intents)
+    sent = json.dumps(projected if projected is not None else _compact(user_profile or {}),
+                      separators=(",", ":"), ensure_ascii=False)
+    projection_stats.record(len(full), len(sent), projected is not None)
+    logger.info(
+        f"✂️ Profile for {','.join(sorted(set(intents)))}: {len(full)} → {len(sent)} chars "
+        f"(~{(len(full) - len(sent)) // 4} tokens saved)"
+    )
+    return sent
@@ -0,0 +1,180 @@
+"""
+Profile Resolver - Answers direct-lookup fields straight from userProfile
+Name, email, phone, LinkedIn and location questions are recognized from the
+question text and filled from the profile without a Bedrock call
+"""
+import json
+import logging
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from config import config
+from models import AIResponse
+from profile_projection import rule_intent
+
+logger = logging.getLogger("ai-service")
+
+
+# Profile keys tried per intent, in order: dotted paths ("personal.firstName")
+# or plain key names found at any depth. Matching ignores case and punctuation.
+DEFAULT_ALIASES: Dict[str, List[str]] = {
+    "personal.firstName": ["personal.firstName", "firstName", "givenName", "fname"],
+    "personal.lastName": ["personal.lastName", "lastName", "surname", "familyName", "lname"],
+    "personal.email": ["personal.email", "email", "emailAddress", "mail"],
+    "personal.phone": ["personal.phone", "phone", "phoneNumber", "mobile", "mobileNumber", "cell"],
+    "personal.linkedin": ["personal.linkedin", "linkedin", "linkedinUrl", "linkedinProfile"],
+    "personal.city": ["personal.city", "city", "town"],
+    "personal.state": ["personal.state", "state", "province", "region"],
+    "personal.country": ["personal.country", "country", "countryName"],
+}
+
+# Questions mentioning these are about something else (a reference's phone, a referral source, ...)
+EXCLUDED = re.compile(
+    r"\bcode\b|extension|hear about|referr|source|reference|emergency|manager|supervisor|"
+    r"recruiter|employer|company|previous|former|school|university|spouse|parent|citizen|birth|nationality"
+)
+
+# Yes/no questions ("Are you willing to relocate to another state?") are never lookups
+YES_NO_START = re.compile(r"^(?:are|do|does|did|have|has|will|would|can|could|is|should|may)\b")
+
+MAX_LOOKUP_WORDS = 8
+
+
+def _norm(key: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", str(key).lower())
+
+
+def _load_aliases() -> Dict[str, List[str]]:
+    """DEFAULT_ALIASES with PROFILE_ALIASES_FILE entries ({intent: [keys]}) tried first"""
+    aliases = {intent: list(keys) for intent, keys in DEFAULT_ALIASES.items()}
+    if not config.PROFILE_ALIASES_FILE:
+        return aliases
+    try:
+        with open(config.PROFILE_ALIASES_FILE, 'r') as f:
+            extra = json.load(f)
+        for intent, keys in extra.items():
+            if intent in aliases:
+                aliases[intent] = list(keys) + [k for k in aliases[intent] if k not in keys]
+    except Exception as e:
+        logger.warning(f"⚠ Could not load profile aliases from {config.PROFILE_ALIASES_FILE}: {e}")
+    return aliases
+
+
+ALIASES = _load_aliases()
+
+
+def _flatten(profile: dict) -> Tuple[Dict[str, Tuple[str, object]], Dict[str, Tuple[str, object]]]:
+    """(normalized dotted path -> (path, value), normalized key -> shallowest (path, value))"""
+    by_path: Dict[str, Tuple[str, object]] = {}
+    by_key: Dict[str, Tuple[str, object]] = {}
+    stack = [("", profile or {})]
+    while stack:
+        prefix, node = stack.pop(0)  # breadth-first: shallow keys win
+        for key, value in node.items():
+            path = f"{prefix}.{key}" if prefix else str(key)
+            if isinstance(value, dict):
+                stack.append((path, value))
+            elif isinstance(value, (str, int, float)) and not isinstance(value, bool):
+                by_path.setdefault(_norm(path), (path, value))
+                by_key.setdefault(_norm(key), (path, value))
+    return by_path, by_key
+
+
+def _valid(intent: str, value: str) -> bool:
+    if intent == "personal.email":
+        return "@" in value
+    if intent == "personal.linkedin":
+        return "linkedin" in value.lower()
+    if intent == "personal.phone":
+        return sum(c.isdigit() for c in value) >= 7
+    return True
+
+
+def _lookup(intent: str, by_path: dict, by_key: dict) -> Optional[Tuple[str, str]]:
+    for alias in ALIASES.get(intent, []):
+        found = by_path.get(_norm(alias)) if "." in alias else by_key.get(_norm(alias))
+        if found is None:
+            continue
+        path, value = found
+        value = str(value).strip()
+        if value and _valid(intent, value):
+            return path, value
+
+    # Split a full name when the profile has no separate first/last name
+    if intent in ("personal.firstName", "personal.lastName"):
+        found = by_key.get("fullname") or by_key.get("name")
+        if found is not None:
+            parts = str(found[1]).split()
+            if len(parts) >= 2:
+                return found[0], parts[0] if intent == "personal.firstName" else parts[-1]
+    return None
+
+
+def recognize(question: str) -> Optional[str]:
+    """Direct-lookup intent for a label-like question, or None"""
+    q = " ".join((question or "").lower().replace("*", " ").split())
+    if not q or len(q.split()) > MAX_LOOKUP_WORDS or YES_NO_START.match(q) or EXCLUDED.search(q):
+        return None
+    # Keyword rules only: a wrong guess here would be returned as the answer
+    intent = rule_intent(q)
+    return intent if intent in ALIASES else None
+
+
+class ResolverStats:
+    """Bedrock calls avoided per intent, and recognized questions the profile could not answer"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.resolved: Counter = Counter()
+        self.unresolved = 0
+
+    def record(self, intent: Optional[str]):
+        with self._lock:
+            if intent is None:
+                self.unresolved += 1
+            else:
+                self.resolved[intent] += 1
+
+    def stats(self) -> dict:
+        return {
+            "enabled": config.PROFILE_RESOLVER,
+            "callsAvoided": sum(self.resolved.values()),
+            "byIntent": dict(self.resolved),
+            "unresolved": self.unresolved,
+        }
+
+
+resolver_stats = ResolverStats()
+
+
+def resolve(question: str, options: Optional[List[str]], user_profile: dict) -> Optional[AIResponse]:
+    """Answer copied from the profile (with the field it came from), or None to fall through"""
+    if not config.PROFILE_RESOLVER:
+        return None
+    intent = recognize(question)
+    if intent is None:
+        return None
+
+    by_path, by_key = _flatten(user_profile)
+    found = _lookup(intent, by_path, by_key)
+    if found is not None and options:
+        # Dropdowns (country, state): the value must be one of the options
+        exact = {o.lower().strip(): o for o in options}
+        option = exact.get(found[1].lower())
+        found = (found[0], option) if option else None
+
+    if found is None:
+        resolver_stats.record(None)
+        return None
+
+    path, value = found
+    resolver_stats.record(intent)
+    return AIResponse(
+        answer=value,
+        confidence=0.99,
+        reasoning=f"Resolved from user profile field '{path}'",
+        intent=intent,
+        intentSource="profile",
+    )
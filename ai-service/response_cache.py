@@ -0,0 +1,147 @@
+"""
+Response Cache - Pre-serialized, pre-compressed JSON bodies per store generation
+Polling endpoints (pattern sync / stats) answer If-None-Match with 304 and
+otherwise serve bytes that were serialized and compressed once per generation
+"""
+import asyncio
+import gzip
+import json
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+from fastapi import Request, Response
+from fastapi.concurrency import run_in_threadpool
+
+from config import config
+
+try:
+    import brotli  # optional: pip install brotli
+except ImportError:
+    brotli = None
+
+
+def _accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    """Accept-Encoding -> {coding: q}; a malformed q counts as 0"""
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(','):
+        coding, *params = [p.strip() for p in part.split(';')]
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding.lower()] = q
+    return accepted
+
+
+def _quality(accepted: Dict[str, float], coding: str) -> float:
+    return accepted.get(coding, accepted.get("*", 0.0))
+
+
+class CachedBody:
+    """One JSON document in every encoding we serve"""
+
+    def __init__(self, payload: dict, etag: str):
+        self.etag = etag
+        self.identity = json.dumps(payload, separators=(',', ':')).encode()
+        self.gzip = gzip.compress(self.identity, compresslevel=6)
+        self.br = brotli.compress(self.identity, quality=5) if brotli else None
+
+    def encoded(self, accept_encoding: str) -> tuple:
+        """(body, content-encoding) for the client's Accept-Encoding (q=0 refuses a coding)"""
+        accepted = _accepted_encodings(accept_encoding)
+        options = [(self.br, "br"), (self.gzip, "gzip")] if self.br is not None else [(self.gzip, "gzip")]
+        # Highest q wins; on a tie the order above (smaller body first)
+        best = max(options, key=lambda option: _quality(accepted, option[1]))
+        if _quality(accepted, best[1]) > 0:
+            return best
+        return self.identity, None
+
+
+class ResponseCache:
+    """Small LRU of CachedBody keyed by (name, generation)"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[str, CachedBody]" = OrderedDict()
+        # One builder per key, so a burst of pollers after a change serializes once
+        self._build_locks: Dict[str, asyncio.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    @staticmethod
+    def etag_for(name: str, generation: int) -> str:
+        # Weak: the same document is served in several content encodings
+        return f'W/"{name}-{generation}"'
+
+    def _get(self, etag: str) -> Optional[CachedBody]:
+        body = self._entries.get(etag)
+        if body is not None:
+            self._entries.move_to_end(etag)
+        return body
+
+    def _put(self, body: CachedBody):
+        self._entries[body.etag] = body
+        self._entries.move_to_end(body.etag)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _build(self, name: str, generation: Callable[[], int], build: Callable[[int], dict]) -> CachedBody:
+        # Generation read right before the payload: the body holds at least that generation
+        current = generation()
+        return CachedBody(build(current), self.etag_for(name, current))
+
+    async def respond(self, request: Request, name: str, generation: Callable[[], int],
+                      build: Callable[[int], dict]) -> Response:
+        """
+        304 if the client already has the current generation, else the cached (or freshly
+        built) body. build(generation) gets the generation the body's ETag will carry.
+        """
+        etag = self.etag_for(name, generation())
+        headers = {"Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+
+        if_none_match = request.headers.get("if-none-match", "")
+        if etag in {tag.strip() for tag in if_none_match.split(',')} or if_none_match.strip() == "*":
+            self.not_modified += 1
+            return Response(status_code=304, headers=dict(headers, ETag=etag))
+
+        body = self._get(etag)
+        if body is None:
+            lock = self._build_locks.setdefault(name, asyncio.Lock())
+            async with lock:
+                body = self._get(etag)
+                if body is None:
+                    self.misses += 1
+                    body = await run_in_threadpool(self._build, name, generation, build)
+                    self._put(body)
+                else:
+                    self.hits += 1
+            if not lock.locked():
+                self._build_locks.pop(name, None)
+        else:
+            self.hits += 1
+
+        headers["ETag"] = body.etag
+        content, encoding = body.encoded(request.headers.get("accept-encoding", ""))
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return Response(content=content, media_type="application/json", headers=headers)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "notModified": self.not_modified,
+            "brotli": brotli is not None,
+        }
+
+
+# Global cache instance
+response_cache = ResponseCache(config.RESPONSE_CACHE_ENTRIES)
@@ -0,0 +1,72 @@
+"""
+Single Flight - Coalesces identical concurrent model calls
+The first caller for a key starts the work; callers arriving while it runs
+await the same result instead of issuing another Bedrock call
+"""
+import asyncio
+from typing import Any, Awaitable, Dict, List, Optional, Sequence
+
+
+class SingleFlight:
+    """In-flight work per key (event-loop only, no locking needed)"""
+
+    def __init__(self):
+        self._flights: Dict[str, asyncio.Future] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    def join(self, key: str) -> Optional[asyncio.Future]:
+        """Future of the call already running for key, if any"""
+        flight = self._flights.get(key)
+        if flight is not None:
+            self.coalesced += 1
+        return flight
+
+    def lead_many(self, keys: Sequence[str], work: Awaitable[List[Any]]) -> List[asyncio.Future]:
+        """
+        Run `work` (returning one result per key) as a task and publish a future per key.
+        The task is not tied to the caller, so a disconnecting leader does not fail its followers.
+        """
+        loop = asyncio.get_running_loop()
+        task = asyncio.ensure_future(work)
+        futures = [loop.create_future() for _ in keys]
+        for key, future in zip(keys, futures):
+            self._flights[key] = future
+        self.leaders += len(keys)
+
+        def _publish(done: asyncio.Task):
+            for i, (key, future) in enumerate(zip(keys, futures)):
+                if self._flights.get(key) is future:
+                    del self._flights[key]
+                if future.done():
+                    continue
+                if done.cancelled():
+                    future.cancel()
+                elif done.exception() is not None:
+                    future.set_exception(done.exception())
+                    future.exception()  # retrieved: nobody may be waiting
+                else:
+                    future.set_result(done.result()[i])
+
+        task.add_done_callback(_publish)
+        return futures
+
+    async def run(self, key: str, work) -> Any:
+        """Await the running call for key, or start `work()` (a coroutine function) as the leader"""
+        flight = self.join(key)
+        if flight is None:
+            async def _single():
+                return [await work()]
+            flight = self.lead_many([key], _single())[0]
+        return await asyncio.shield(flight)
+
+    def stats(self) -> dict:
+        return {
+            "inFlight": len(self._flights),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+        }
+
+
+# Global instance for model predictions
+prediction_flights = SingleFlight()
@@ -0,0 +1,344 @@
+"""
+SQLite Pattern Store - Pattern storage backend for large / shared deployments
+Selected with PATTERNS_BACKEND=sqlite
+
+- WAL journal mode, one connection per thread
+- Indexes on intent, fieldType, lastUsed (plus question, usageCount and revision lookups)
+- FTS5 virtual table over questionPattern for fuzzy-match candidate retrieval;
+  candidates are then scored with the same word overlap as the JSON backend
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from config import config
+from pattern_index import normalize_question, rank, tokenize
+from pattern_store import PatternStore
+
+logger = logging.getLogger("ai-service")
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS patterns (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    questionPattern TEXT NOT NULL,
+    normQuestion TEXT NOT NULL,
+    intent TEXT,
+    fieldType TEXT,
+    usageCount INTEGER NOT NULL DEFAULT 0,
+    lastUsed TEXT,
+    revision INTEGER NOT NULL DEFAULT 0,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_patterns_intent ON patterns(intent);
+CREATE INDEX IF NOT EXISTS idx_patterns_field_type ON patterns(fieldType);
+CREATE INDEX IF NOT EXISTS idx_patterns_last_used ON patterns(lastUsed);
+CREATE INDEX IF NOT EXISTS idx_patterns_question ON patterns(normQuestion, intent);
+CREATE INDEX IF NOT EXISTS idx_patterns_usage ON patterns(usageCount);
+CREATE INDEX IF NOT EXISTS idx_patterns_revision ON patterns(revision);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS patterns_fts USING fts5(
+    questionPattern, content='patterns', content_rowid='seq'
+);
+CREATE TRIGGER IF NOT EXISTS patterns_ai AFTER INSERT ON patterns BEGIN
+    INSERT INTO patterns_fts(rowid, questionPattern) VALUES (new.seq, new.questionPattern);
+END;
+CREATE TRIGGER IF NOT EXISTS patterns_ad AFTER DELETE ON patterns BEGIN
+    INSERT INTO patterns_fts(patterns_fts, rowid, questionPattern) VALUES ('delete', old.seq, old.questionPattern);
+END;
+CREATE TRIGGER IF NOT EXISTS patterns_au AFTER UPDATE OF questionPattern ON patterns BEGIN
+    INSERT INTO patterns_fts(patterns_fts, rowid, questionPattern) VALUES ('delete', old.seq, old.questionPattern);
+    INSERT INTO patterns_fts(rowid, questionPattern) VALUES (new.seq, new.questionPattern);
+END;
+"""
+
+
+def _fts_query(question: str) -> str:
+    """OR of the question's words, each quoted so FTS5 syntax characters are inert"""
+    terms = ['"' + w.replace('"', '""') + '"' for w in tokenize(question)]
+    return " OR ".join(terms)
+
+
+class _Transaction:
+    """
+    Read-modify-write lock for the SQLite store: the outermost enter starts a
+    BEGIN IMMEDIATE transaction, which also serializes writers across worker processes
+    """
+
+    def __init__(self, store: "SqlitePatternStore"):
+        self._store = store
+        self._rlock = threading.RLock()
+        self.depth = 0
+
+    def __enter__(self):
+        self._rlock.acquire()
+        self.depth += 1
+        if self.depth == 1:
+            try:
+                self._store._conn().execute("BEGIN IMMEDIATE")
+            except BaseException:
+                self.depth -= 1
+                self._rlock.release()
+                raise
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if self.depth == 1:
+                conn = self._store._conn()
+                if exc_type is None:
+                    conn.commit()
+                else:
+                    conn.rollback()
+        finally:
+            self.depth -= 1
+            self._rlock.release()
+
+
+class SqlitePatternStore(PatternStore):
+    """Patterns persisted in a SQLite database (safe to share between worker processes)"""
+
+    def __init__(self, path: str, import_from: Optional[str] = None):
+        self.path = path
+        self.import_from = import_from
+        self.lock = _Transaction(self)
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+        # Thread running _initialize (its own _conn() calls during the JSON import skip it)
+        self._init_thread: Optional[int] = None
+
+    # ---------- connections ----------
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        if not self._initialized and self._init_thread != threading.get_ident():
+            self._initialize(conn)
+        return conn
+
+    def _initialize(self, conn: sqlite3.Connection):
+        with self._init_lock:
+            if self._initialized:
+                return
+            self._init_thread = threading.get_ident()
+            try:
+                self._create_schema(conn)
+                with self.lock:
+                    empty = conn.execute("SELECT 1 FROM patterns LIMIT 1").fetchone() is None
+                    if empty and self.import_from and os.path.exists(self.import_from):
+                        self._import_json(self.import_from)
+                # Only now: other threads wait on _init_lock until the import is done
+                self._initialized = True
+            finally:
+                self._init_thread = None
+
+    @staticmethod
+    def _create_schema(conn: sqlite3.Connection):
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(patterns)")}
+        if columns and "revision" not in columns:
+            # Databases created before revisions existed
+            conn.execute("ALTER TABLE patterns ADD COLUMN revision INTEGER NOT NULL DEFAULT 0")
+            conn.commit()
+        conn.executescript(SCHEMA)
+
+    def _import_json(self, path: str):
+        """One-time migration of an existing patterns.json into an empty database"""
+        try:
+            with open(path, 'r') as f:
+                patterns = json.load(f).get('patterns', [])
+        except Exception as e:
+            logger.warning(f"⚠ Could not import {path}: {e}")
+            return
+        self.replace_all(patterns)
+        logger.info(f"📥 Imported {len(patterns)} patterns from {path} into {self.path}")
+
+    # ---------- row mapping ----------
+
+    def _ensure_id(self, pattern: dict):
+        if not pattern.get('id'):
+            pattern['id'] = f"pattern_{os.urandom(8).hex()}"
+
+    def _row(self, pattern: dict) -> tuple:
+        question = pattern.get('questionPattern') or ''
+        return (
+            pattern['id'],
+            question,
+            normalize_question(question),
+            pattern.get('intent'),
+            pattern.get('fieldType'),
+            pattern.get('usageCount') or 0,
+            pattern.get('lastUsed'),
+            pattern.get('revision') or 0,
+            json.dumps(pattern, separators=(',', ':')),
+        )
+
+    def _next_revision(self) -> int:
+        """Called inside a write transaction, so concurrent writers never share a revision"""
+        return self._conn().execute("SELECT COALESCE(MAX(revision), 0) + 1 FROM patterns").fetchone()[0]
+
+    def _select(self, where: str = "", params: tuple = (), suffix: str = "") -> List[dict]:
+        sql = f"SELECT data FROM patterns {where} {suffix}"
+        return [json.loads(row[0]) for row in self._conn().execute(sql, params)]
+
+    # ---------- reads ----------
+
+    def all(self) -> List[dict]:
+        return self._select(suffix="ORDER BY seq")
+
+    def iter_all(self) -> Iterator[dict]:
+        """
+        Rows fetched in batches on a connection of its own: the generator may be
+        resumed from different threads, and its read transaction sees one snapshot
+        """
+        self._conn()  # schema / import
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        try:
+            cursor = conn.execute("SELECT data FROM patterns ORDER BY seq")
+            while True:
+                rows = cursor.fetchmany(config.SYNC_STREAM_BATCH_SIZE)
+                if not rows:
+                    break
+                for (data,) in rows:
+                    yield json.loads(data)
+        finally:
+            conn.close()
+
+    def count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM patterns").fetchone()[0]
+
+    def exact_match(self, question: str) -> Optional[dict]:
+        rows = self._select("WHERE normQuestion = ?", (normalize_question(question),), "ORDER BY seq LIMIT 1")
+        return rows[0] if rows else None
+
+    def find(self, intent: str, question: str) -> Optional[dict]:
+        rows = self._select(
+            "WHERE normQuestion = ? AND intent = ?",
+            (normalize_question(question), intent),
+            "ORDER BY seq LIMIT 1",
+        )
+        return rows[0] if rows else None
+
+    def top_k(self, question: str, k: int, threshold: float) -> List[Tuple[float, dict]]:
+        """
+        Approximate: only the SQLITE_FTS_CANDIDATES best bm25 matches are scored by word
+        overlap, so a qualifying pattern beyond that cut (e.g. one sharing only very common
+        words with the question) can be missed. Exact questions are served by exact_match.
+        """
+        match = _fts_query(question)
+        if not match:
+            return []
+        try:
+            rows = self._conn().execute(
+                """
+                SELECT p.seq, p.data FROM patterns_fts
+                JOIN patterns p ON p.seq = patterns_fts.rowid
+                WHERE patterns_fts MATCH ?
+                ORDER BY patterns_fts.rank
+                LIMIT ?
+                """,
+                (match, config.SQLITE_FTS_CANDIDATES),
+            ).fetchall()
+        except sqlite3.OperationalError as e:
+            logger.warning(f"⚠ FTS query failed for {question!r}: {e}")
+            return []
+        return rank(question, ((seq, json.loads(data)) for seq, data in rows), k, threshold)
+
+    def revision(self) -> int:
+        return self._conn().execute("SELECT COALESCE(MAX(revision), 0) FROM patterns").fetchone()[0]
+
+    def changes_since(self, revision: int) -> List[dict]:
+        return self._select("WHERE revision > ?", (revision,), "ORDER BY revision")
+
+    def intent_counts(self) -> Dict[str, int]:
+        rows = self._conn().execute("SELECT intent, COUNT(*) FROM patterns GROUP BY intent")
+        return {(intent if intent is not None else 'unknown'): n for intent, n in rows}
+
+    def top_used(self, n: int) -> List[dict]:
+        return self._select(suffix="ORDER BY usageCount DESC, seq LIMIT ?", params=(n,))
+
+    # ---------- writes ----------
+
+    def _write(self, sql: str, params: tuple = (), many: bool = False):
+        """Run a write, committing it unless a _Transaction is open"""
+        with self.lock:
+            conn = self._conn()
+            if many:
+                conn.executemany(sql, params)
+            else:
+                conn.execute(sql, params)
+
+    def add(self, pattern: dict):
+        self._ensure_id(pattern)
+        with self.lock:
+            pattern['revision'] = self._next_revision()
+            self._write(
+                """
+                INSERT INTO patterns
+                    (id, questionPattern, normQuestion, intent, fieldType, usageCount, lastUsed, revision, data)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                self._row(pattern),
+            )
+
+    def updated(self, pattern: dict):
+        self._ensure_id(pattern)
+        with self.lock:
+            pattern['revision'] = self._next_revision()
+            row = self._row(pattern)
+            self._write(
+                """
+                UPDATE patterns SET questionPattern = ?, normQuestion = ?, intent = ?, fieldType = ?,
+                    usageCount = ?, lastUsed = ?, revision = ?, data = ?
+                WHERE id = ?
+                """,
+                row[1:] + (row[0],),
+            )
+
+    def replace_all(self, patterns: List[dict]):
+        for p in patterns:
+            self._ensure_id(p)
+        with self.lock:
+            # Everything changed: each pattern gets a revision past the current one
+            revision = self.revision()
+            for p in patterns:
+                revision += 1
+                p['revision'] = revision
+            self._write("DELETE FROM patterns")
+            self._write(
+                """
+                INSERT OR REPLACE INTO patterns
+                    (id, questionPattern, normQuestion, intent, fieldType, usageCount, lastUsed, revision, data)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                [self._row(p) for p in patterns],
+                many=True,
+            )
+
+    # ---------- lifecycle ----------
+
+    def start(self):
+        self._conn()
+
+    def close(self):
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
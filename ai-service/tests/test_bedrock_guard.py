@@ -0,0 +1,191 @@
+import threading
+import time
+
+import pytest
+from botocore.exceptions import ClientError
+
+from bedrock_guard import BedrockGuard, BedrockUnavailable, CircuitBreaker
+
+
+def _throttling():
+    return ClientError(
+        {"Error": {"Code": "ThrottlingException", "Message": "slow down"},
+         "ResponseMetadata": {"HTTPStatusCode": 429}},
+        "InvokeModel",
+    )
+
+
+def _open(breaker: CircuitBreaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_seconds=60)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    assert breaker.stats()["trips"] == 1
+    assert breaker.stats()["shortCircuited"] == 1
+
+
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=60)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+
+
+def test_half_open_lets_one_probe_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.05)
+    _open(breaker)
+    time.sleep(0.06)
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()
+
+
+def test_probe_success_closes_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.05)
+    _open(breaker)
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow() and breaker.allow()
+
+
+def test_probe_failure_reopens_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.05)
+    _open(breaker)
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    assert breaker.stats()["trips"] == 2
+
+
+def test_call_fails_fast_while_open():
+    guard = BedrockGuard()
+    _open(guard.breaker)
+    calls = []
+    with pytest.raises(BedrockUnavailable):
+        guard.call("test", lambda: calls.append(1))
+    assert calls == []
+    guard.shutdown()
+
+
+def test_request_errors_do_not_trip_the_breaker():
+    guard = BedrockGuard()
+
+    def _invalid():
+        raise ValueError("bad request")
+
+    for _ in range(guard.breaker.failure_threshold + 1):
+        with pytest.raises(ValueError):
+            guard.call("test", _invalid)
+    assert guard.breaker.state == "closed"
+    guard.shutdown()
+
+
+def test_throttling_counts_as_failure(monkeypatch):
+    monkeypatch.setattr("bedrock_guard.config.BEDROCK_THROTTLE_RETRIES", 0)
+    guard = BedrockGuard()
+
+    def _throttled():
+        raise _throttling()
+
+    with pytest.raises(BedrockUnavailable):
+        guard.call("test", _throttled)
+    assert guard.breaker.stats()["consecutiveFailures"] == 1
+    assert guard.throttled == 1
+    guard.shutdown()
+
+
+def test_abandoned_stream_releases_the_half_open_probe():
+    guard = BedrockGuard()
+    guard.breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.05)
+    _open(guard.breaker)
+    time.sleep(0.06)
+
+    stream = guard.stream("test", lambda: iter(["a", "b", "c"]))
+    assert next(stream) == "a"
+    # Consumer goes away mid-stream
+    stream.close()
+
+    assert guard.breaker.state == "half_open"
+    assert guard.breaker.allow()
+    guard.shutdown()
+
+
+def test_broken_stream_counts_as_failure():
+    guard = BedrockGuard()
+
+    def _chunks():
+        yield "a"
+        raise ConnectionError("reset")
+
+    with pytest.raises(BedrockUnavailable):
+        list(guard.stream("test", _chunks))
+    assert guard.breaker.stats()["consecutiveFailures"] == 1
+    assert guard.stream_failures == 1
+    guard.shutdown()
+
+
+def test_completed_stream_closes_a_half_open_breaker():
+    guard = BedrockGuard()
+    guard.breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.05)
+    _open(guard.breaker)
+    time.sleep(0.06)
+
+    assert list(guard.stream("test", lambda: iter(["a", "b"]))) == ["a", "b"]
+    assert guard.breaker.state == "closed"
+    guard.shutdown()
+
+
+def test_calls_are_shed_while_abandoned_attempts_hold_every_thread():
+    guard = BedrockGuard()
+    guard.max_workers = 2
+    release = threading.Event()
+
+    # Both attempts miss their deadline but keep their threads busy
+    for _ in range(2):
+        with pytest.raises(BedrockUnavailable):
+            guard.call("test", release.wait, deadline=0.01)
+    assert guard.running == 2
+
+    started = time.monotonic()
+    with pytest.raises(BedrockUnavailable, match="busy"):
+        guard.call("test", lambda: "never sent")
+    assert time.monotonic() - started < 0.5
+    assert guard.saturated == 1
+
+    release.set()
+    deadline = time.monotonic() + 2
+    while guard.running and time.monotonic() < deadline:
+        time.sleep(0.01)
+    guard.breaker.record_success()
+    assert guard.call("test", lambda: "ok") == "ok"
+    guard.shutdown()
+
+
+def test_no_hedge_while_half_the_pool_is_busy(monkeypatch):
+    monkeypatch.setattr("bedrock_guard.config.BEDROCK_HEDGING", True)
+    monkeypatch.setattr("bedrock_guard.config.BEDROCK_HEDGE_MIN_DELAY", 0.01)
+    guard = BedrockGuard()
+    guard.max_workers = 2
+    for _ in range(20):
+        guard.latency.record("test", 0.001)
+
+    release = threading.Event()
+    with pytest.raises(BedrockUnavailable):
+        guard.call("test", release.wait, deadline=0.1)
+    assert guard.hedges == 0
+    release.set()
+    guard.shutdown()
@@ -0,0 +1,57 @@
+import asyncio
+import threading
+
+from adaptive_limiter import AdaptiveLimiter
+from inference_pool import InferencePool
+
+
+def _pool(limit: int) -> InferencePool:
+    limiter = AdaptiveLimiter(initial=limit, min_limit=limit, max_limit=limit, adaptive=False)
+    return InferencePool(limiter, max_workers=limit)
+
+
+def test_cancelled_caller_keeps_the_slot_until_the_call_ends():
+    pool = _pool(1)
+    release = threading.Event()
+
+    async def _main():
+        task = asyncio.ensure_future(pool.run(release.wait))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.sleep(0.05)
+        # Thread still busy: the slot must still be taken
+        assert pool.stats()["inFlight"] == 1
+        waiter = asyncio.ensure_future(pool.run(lambda: "next"))
+        await asyncio.sleep(0.05)
+        assert not waiter.done()
+        assert pool.stats()["queued"] == 1
+
+        release.set()
+        assert await asyncio.wait_for(waiter, 2) == "next"
+
+    try:
+        asyncio.run(_main())
+    finally:
+        release.set()
+    assert pool.stats()["inFlight"] == 0
+    pool.shutdown()
+
+
+def test_results_and_errors_are_counted():
+    pool = _pool(2)
+
+    def _fail():
+        raise ValueError("boom")
+
+    async def _main():
+        assert await pool.run(lambda x: x * 2, 21) == 42
+        try:
+            await pool.run(_fail)
+        except ValueError:
+            pass
+        await asyncio.sleep(0.01)
+
+    asyncio.run(_main())
+    stats = pool.stats()
+    assert (stats["completed"], stats["failed"], stats["inFlight"]) == (1, 1, 0)
+    pool.shutdown()
@@ -0,0 +1,88 @@
+import json
+
+from pattern_store import JsonPatternStore
+
+
+def _store(tmp_path, compact_bytes=1 << 20):
+    return JsonPatternStore(
+        str(tmp_path / "patterns.json"),
+        str(tmp_path / "patterns.journal.jsonl"),
+        flush_interval=60,
+        compact_bytes=compact_bytes,
+        compact_interval=3600,
+    )
+
+
+def _pattern(n: int) -> dict:
+    return {"id": f"p{n}", "questionPattern": f"question number {n}", "intent": "personal.firstName"}
+
+
+def test_journal_is_replayed_on_restart(tmp_path):
+    store = _store(tmp_path)
+    store.add(_pattern(1))
+    store.add(_pattern(2))
+    store.flush()
+    assert not (tmp_path / "patterns.json").exists()
+
+    reopened = _store(tmp_path)
+    assert [p["id"] for p in reopened.all()] == ["p1", "p2"]
+    assert reopened.revision() == 2
+    assert reopened.exact_match("question number 2")["id"] == "p2"
+
+
+def test_torn_journal_tail_is_ignored(tmp_path):
+    store = _store(tmp_path)
+    store.add(_pattern(1))
+    store.flush()
+    # Crash in the middle of appending the next record
+    record = json.dumps({"op": "put", "pattern": _pattern(2)})
+    with open(tmp_path / "patterns.journal.jsonl", "a") as f:
+        f.write(record[:len(record) // 2])
+
+    reopened = _store(tmp_path)
+    assert [p["id"] for p in reopened.all()] == ["p1"]
+
+    # Later writes still land and replay
+    reopened.add(_pattern(3))
+    reopened.flush(compact=True)
+    assert [p["id"] for p in _store(tmp_path).all()] == ["p1", "p3"]
+
+
+def test_updates_replay_in_place(tmp_path):
+    store = _store(tmp_path)
+    store.add(_pattern(1))
+    store.flush()
+    pattern = store.find("personal.firstName", "question number 1")
+    pattern["usageCount"] = 5
+    store.updated(pattern)
+    store.flush()
+
+    reopened = _store(tmp_path)
+    assert reopened.count() == 1
+    assert reopened.all()[0]["usageCount"] == 5
+    assert reopened.revision() == 2
+
+
+def test_compaction_writes_snapshot_and_truncates_journal(tmp_path):
+    store = _store(tmp_path, compact_bytes=1)
+    store.add(_pattern(1))
+    store.flush()
+    store.add(_pattern(2))
+    store.flush()
+
+    with open(tmp_path / "patterns.json") as f:
+        assert [p["id"] for p in json.load(f)["patterns"]] == ["p1", "p2"]
+    assert (tmp_path / "patterns.journal.jsonl").stat().st_size == 0
+    assert [p["id"] for p in _store(tmp_path).all()] == ["p1", "p2"]
+
+
+def test_replace_all_compacts_on_next_flush(tmp_path):
+    store = _store(tmp_path)
+    store.add(_pattern(1))
+    store.flush()
+    store.replace_all([_pattern(7)])
+    store.flush()
+
+    reopened = _store(tmp_path)
+    assert [p["id"] for p in reopened.all()] == ["p7"]
+    assert reopened.revision() > 1
@@ -0,0 +1,95 @@
+import gzip
+import json
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from response_cache import CachedBody, ResponseCache
+
+
+@pytest.fixture
+def body():
+    return CachedBody({"hello": "world"}, 'W/"doc-1"')
+
+
+@pytest.mark.parametrize("accept, expected", [
+    ("", None),
+    ("identity", None),
+    ("gzip", "gzip"),
+    ("GZIP, deflate", "gzip"),
+    ("gzip;q=0", None),
+    ("gzip; q=0.0, identity", None),
+    ("gzip;q=0.5", "gzip"),
+    ("gzip;q=oops", None),
+    ("*", "gzip"),
+    ("*;q=0", None),
+    ("*, gzip;q=0", None),
+])
+def test_gzip_negotiation(body, monkeypatch, accept, expected):
+    monkeypatch.setattr(body, "br", None)
+    content, encoding = body.encoded(accept)
+    assert encoding == expected
+    if encoding == "gzip":
+        assert gzip.decompress(content) == body.identity
+
+
+def test_brotli_respects_q_values(body, monkeypatch):
+    monkeypatch.setattr(body, "br", b"brotli-bytes")
+    assert body.encoded("gzip, br")[1] == "br"
+    assert body.encoded("br;q=0, gzip")[1] == "gzip"
+    assert body.encoded("gzip;q=0.9, br;q=0.4")[1] == "gzip"
+
+
+def _app(cache: ResponseCache, state: dict) -> TestClient:
+    app = FastAPI()
+
+    @app.get("/doc")
+    async def doc(request: Request):
+        def _build(generation: int) -> dict:
+            state["builds"] += 1
+            return {"generation": generation}
+
+        return await cache.respond(request, "doc", lambda: state["generation"], _build)
+
+    return TestClient(app)
+
+
+def test_if_none_match_returns_304_until_the_generation_changes():
+    cache = ResponseCache(max_entries=4)
+    state = {"generation": 1, "builds": 0}
+    client = _app(cache, state)
+
+    first = client.get("/doc")
+    assert first.status_code == 200
+    assert first.json() == {"generation": 1}
+    etag = first.headers["etag"]
+    assert etag == 'W/"doc-1"'
+
+    not_modified = client.get("/doc", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["etag"] == etag
+
+    state["generation"] = 2
+    changed = client.get("/doc", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert json.loads(changed.content) == {"generation": 2}
+    assert changed.headers["etag"] == 'W/"doc-2"'
+
+
+def test_body_is_built_once_per_generation():
+    cache = ResponseCache(max_entries=4)
+    state = {"generation": 1, "builds": 0}
+    client = _app(cache, state)
+
+    for _ in range(3):
+        assert client.get("/doc", headers={"Accept-Encoding": "gzip"}).status_code == 200
+    assert state["builds"] == 1
+    assert cache.stats()["hits"] == 2
+
+
+def test_wildcard_if_none_match():
+    cache = ResponseCache(max_entries=4)
+    client = _app(cache, {"generation": 1, "builds": 0})
+    assert client.get("/doc", headers={"If-None-Match": "*"}).status_code == 304
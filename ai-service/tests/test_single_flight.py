@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+
+from single_flight import SingleFlight
+
+
+def test_followers_share_the_leaders_result():
+    flights = SingleFlight()
+    calls = []
+
+    async def _work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "answer"
+
+    async def _main():
+        return await asyncio.gather(*(flights.run("key", _work) for _ in range(5)))
+
+    assert asyncio.run(_main()) == ["answer"] * 5
+    assert calls == [1]
+    assert flights.stats() == {"inFlight": 0, "leaders": 1, "coalesced": 4}
+
+
+def test_followers_get_the_leaders_exception():
+    flights = SingleFlight()
+    calls = []
+
+    async def _fail():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("bedrock down")
+
+    async def _main():
+        return await asyncio.gather(*(flights.run("key", _fail) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(_main())
+    assert len(calls) == 1
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert flights.stats()["inFlight"] == 0
+
+
+def test_a_failed_flight_is_not_reused():
+    flights = SingleFlight()
+
+    async def _fail():
+        raise RuntimeError("once")
+
+    async def _ok():
+        return "ok"
+
+    async def _main():
+        with pytest.raises(RuntimeError):
+            await flights.run("key", _fail)
+        return await flights.run("key", _ok)
+
+    assert asyncio.run(_main()) == "ok"
+    assert flights.stats()["leaders"] == 2
+
+
+def test_cancelled_follower_does_not_cancel_the_leader():
+    flights = SingleFlight()
+
+    async def _work():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def _main():
+        leader = asyncio.ensure_future(flights.run("key", _work))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flights.run("key", _work))
+        await asyncio.sleep(0)
+        follower.cancel()
+        return await leader
+
+    assert asyncio.run(_main()) == "done"
@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+from ai_service import _AnswerStreamParser
+
+REPLY = json.dumps({
+    "answer": 'Café "quoted" \\ back\nslash 😀 tab\tend',
+    "confidence": 0.9,
+    "reasoning": "r",
+    "intent": "experience.summary",
+}, ensure_ascii=True)
+
+
+def _feed(reply: str, size: int) -> str:
+    parser = _AnswerStreamParser()
+    out = "".join(parser.feed(reply[i:i + size]) for i in range(0, len(reply), size))
+    assert parser.done
+    return out
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 7, 11, 1000])
+def test_answer_decodes_across_any_chunking(size):
+    assert _feed(REPLY, size) == json.loads(REPLY)["answer"]
+
+
+def test_surrogate_pair_split_between_chunks():
+    reply = '{"answer": "x\\ud83d\\ude00y"}'
+    split = reply.index("\\ude00") + 3
+    parser = _AnswerStreamParser()
+    first = parser.feed(reply[:split])
+    assert first == "x"
+    assert first + parser.feed(reply[split:]) == "x\U0001F600y"
+
+
+def test_lone_surrogate_is_dropped():
+    assert _feed('{"answer": "a\\ud83db and more text", "intent": "x"}', 4) == "ab and more text"
+
+
+def test_text_after_the_answer_is_ignored():
+    parser = _AnswerStreamParser()
+    assert parser.feed('{"answer": "yes", "reasoning": "no"}') == "yes"
+    assert parser.feed(', "extra": "ignored"}') == ""
+
+
+def test_nothing_before_the_answer_key():
+    parser = _AnswerStreamParser()
+    assert parser.feed('{"confidence": 0.9, "ans') == ""
+    assert parser.feed('wer": "ok"}') == "ok"
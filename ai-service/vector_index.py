@@ -0,0 +1,215 @@
+"""
+Vector Index - Semantic nearest-pattern search over stored questions
+CPU-only embeddings (signed hashing of character n-grams and content words)
+in one contiguous NumPy matrix; a lookup is a single matrix-vector product
+plus top-k. Kept in sync from the store's revision feed and saved next to it.
+"""
+import logging
+import os
+import re
+import tempfile
+import threading
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import config
+from pattern_store import _record_key, pattern_store
+
+logger = logging.getLogger("ai-service")
+
+# Words that carry no meaning for matching form questions
+STOP_WORDS = frozenset(
+    "a an and are as at be by can could do does for from have how i in is it me my now of on "
+    "or our please the this to us we what when which will with would you your".split()
+)
+
+
+def embed(text: str, dim: int) -> np.ndarray:
+    """L2-normalized float32 vector; paraphrases sharing word stems land close together"""
+    words = [w for w in re.findall(r"[a-z0-9]+", (text or "").lower()) if w not in STOP_WORDS]
+    grams = [f"w:{w}" for w in words]
+    for w in words:
+        padded = f" {w} "
+        for n in (3, 4):
+            grams += [padded[i:i + n] for i in range(len(padded) - n + 1)]
+
+    vector = np.zeros(dim, dtype=np.float32)
+    for g in grams:
+        h = zlib.crc32(g.encode())
+        # Low bits pick the bucket, one high bit the sign (keeps collisions unbiased)
+        vector[h % dim] += 1.0 if h & 0x80000000 else -1.0
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
+
+
+class VectorIndex:
+    """One row per pattern; rows are overwritten in place when a pattern changes"""
+
+    def __init__(self, path: str, dim: int):
+        self.path = path
+        self.dim = dim
+        self._lock = threading.Lock()
+        self._matrix = np.zeros((0, dim), dtype=np.float32)
+        self._size = 0
+        self._row_of: Dict[str, int] = {}
+        self._keys: List[Tuple[str, str]] = []  # (intent, questionPattern) per row
+        self._revision: Optional[int] = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    # ---------- updates ----------
+
+    def _set_row(self, pattern: dict):
+        key = _record_key(pattern)
+        question = pattern.get('questionPattern') or ''
+        row = self._row_of.get(key)
+        if row is None:
+            if self._size == len(self._matrix):
+                grown = np.zeros((max(64, 2 * len(self._matrix)), self.dim), dtype=np.float32)
+                grown[:self._size] = self._matrix[:self._size]
+                self._matrix = grown
+            row = self._size
+            self._size += 1
+            self._row_of[key] = row
+            self._keys.append((pattern.get('intent') or '', question))
+        else:
+            self._keys[row] = (pattern.get('intent') or '', question)
+        self._matrix[row] = embed(question, self.dim)
+
+    def rebuild(self):
+        """Embed every stored pattern"""
+        with self._lock:
+            revision = pattern_store.revision()
+            self._matrix = np.zeros((0, self.dim), dtype=np.float32)
+            self._size = 0
+            self._row_of, self._keys = {}, []
+            for pattern in pattern_store.iter_all():
+                self._set_row(pattern)
+            self._revision = revision
+        logger.info(f"🧭 Vector index built: {self._size} patterns, dim {self.dim}")
+
+    def refresh(self):
+        """Apply patterns created/updated since the last sync; rebuild if the store was replaced"""
+        with self._lock:
+            revision = pattern_store.revision()
+            if revision == self._revision:
+                return
+            if self._revision is not None and revision > self._revision:
+                for pattern in pattern_store.changes_since(self._revision):
+                    self._set_row(pattern)
+                self._revision = revision
+                # Rows are never dropped here, so more rows than patterns means replace_all
+                # removed some; their stale rows would take top-k slots
+                if self._size <= pattern_store.count():
+                    return
+        # Never built, store went back to an older revision, or replaced
+        self.rebuild()
+
+    # ---------- search ----------
+
+    def search(self, question: str, k: int, threshold: float) -> List[Tuple[float, dict]]:
+        """Top-k (cosine, pattern) with cosine >= threshold, best first"""
+        if pattern_store.revision() != self._revision:
+            self.refresh()
+        query = embed(question, self.dim)
+        with self._lock:
+            size, matrix, keys = self._size, self._matrix, list(self._keys)
+        if size == 0 or k <= 0 or not query.any():
+            return []
+
+        scores = matrix[:size] @ query
+        k = min(k, size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        results = []
+        for row in top.tolist():
+            score = float(scores[row])
+            if score < threshold:
+                break
+            pattern = pattern_store.find(*keys[row])
+            if pattern is not None:
+                results.append((score, pattern))
+        return results
+
+    # ---------- persistence ----------
+
+    def load(self) -> bool:
+        """Restore a saved index (then refresh() catches up on newer revisions)"""
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with np.load(self.path, allow_pickle=False) as saved:
+                matrix = saved["matrix"].astype(np.float32)
+                if matrix.shape[1] != self.dim:
+                    return False
+                intents = saved["intents"].tolist()
+                questions = saved["questions"].tolist()
+                ids = saved["ids"].tolist()
+                revision = int(saved["revision"])
+        except Exception as e:
+            logger.warning(f"⚠ Could not load vector index {self.path}: {e}")
+            return False
+
+        with self._lock:
+            self._matrix = np.ascontiguousarray(matrix)
+            self._size = len(matrix)
+            self._keys = list(zip(intents, questions))
+            self._row_of = {key: row for row, key in enumerate(ids)}
+            self._revision = revision
+        logger.info(f"🧭 Vector index loaded: {self._size} patterns (revision {revision})")
+        return True
+
+    def save(self):
+        with self._lock:
+            if self._revision is None:
+                return
+            ids = [None] * self._size
+            for key, row in self._row_of.items():
+                ids[row] = key
+            arrays = {
+                "matrix": self._matrix[:self._size],
+                "intents": np.array([k[0] for k in self._keys], dtype=str),
+                "questions": np.array([k[1] for k in self._keys], dtype=str),
+                "ids": np.array(ids, dtype=str),
+                "revision": np.array(self._revision),
+            }
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".npz")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(tmp, self.path)
+        except Exception:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    # ---------- lifecycle ----------
+
+    def start(self):
+        if not config.SEMANTIC_SEARCH:
+            return
+        if not self.load() or self._size > pattern_store.count():
+            self.rebuild()
+        self.refresh()
+
+    def close(self):
+        if config.SEMANTIC_SEARCH:
+            self.save()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": config.SEMANTIC_SEARCH,
+            "patterns": self._size,
+            "dim": self.dim,
+            "revision": self._revision,
+        }
+
+
+# Global index
+vector_index = VectorIndex(config.PATTERNS_VECTORS_FILE, config.EMBEDDING_DIM)